@@ -5,51 +5,66 @@ Create extended looping versions of the Halloween pumpkin video
 
 import cv2
 import os
+import sys
+import tempfile
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'scripts'))
 
-def create_looped_video(input_path, output_path, loop_count=3):
-    """Create a looped version of the video"""
-    print(f"Creating {loop_count}x looped version...")
-    
-    # Open input video
+from ffmpeg_utils import run_ffmpeg, write_concat_list
+
+def get_video_info(input_path):
+    """Read frame count, fps and size from the container without decoding frames"""
     cap = cv2.VideoCapture(input_path)
+    if not cap.isOpened():
+        raise RuntimeError(f"Could not open {input_path}")
     
-    # Get video properties
-    fps = int(cap.get(cv2.CAP_PROP_FPS))
+    fps = cap.get(cv2.CAP_PROP_FPS)
     width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
     height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
     total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    cap.release()
     
-    print(f"Original video: {total_frames} frames, {fps} fps, {width}x{height}")
-    
-    # Create output video
-    fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-    out = cv2.VideoWriter(output_path, fourcc, fps, (width, height))
-    
-    # Read all frames from original video
-    frames = []
-    while True:
-        ret, frame = cap.read()
-        if not ret:
-            break
-        frames.append(frame)
+    return total_frames, fps, width, height
+
+def create_looped_videos(input_path, versions):
+    """Create several looped versions with one stream-copy pass over the input
     
-    cap.release()
+    versions is a list of (loop_count, output_path). The input is concatenated
+    with itself at the container level (no decode, no re-encode, audio kept) and
+    every output is cut from that single stream at its own loop count.
+    """
+    total_frames, fps, width, height = get_video_info(input_path)
+    duration = total_frames / fps
+    max_loops = max(loop_count for loop_count, _ in versions)
     
-    # Write looped frames
-    for loop in range(loop_count):
-        print(f"Writing loop {loop + 1}/{loop_count}...")
-        for frame in frames:
-            out.write(frame)
+    print(f"Original video: {total_frames} frames, {fps:g} fps, {width}x{height}")
+    print(f"Creating {', '.join(f'{loop_count}x' for loop_count, _ in versions)} looped versions...")
     
-    out.release()
+    fd, list_path = tempfile.mkstemp(suffix=".txt")
+    os.close(fd)
+    try:
+        write_concat_list([input_path] * max_loops, list_path)
+        
+        args = ["-f", "concat", "-safe", "0", "-i", list_path]
+        for loop_count, output_path in versions:
+            args += ["-map", "0", "-c", "copy", "-t", f"{duration * loop_count:.6f}", output_path]
+        run_ffmpeg(args)
+    finally:
+        os.remove(list_path)
     
-    # Get output file size
-    output_size = os.path.getsize(output_path) / (1024 * 1024)  # MB
-    total_duration = (total_frames * loop_count) / fps
+    for loop_count, output_path in versions:
+        # Get output file size
+        output_size = os.path.getsize(output_path) / (1024 * 1024)  # MB
+        total_duration = duration * loop_count
+        
+        print(f"Created: {output_path}")
+        print(f"Size: {output_size:.1f} MB")
+        print(f"Duration: {total_duration:.1f} seconds ({total_duration/60:.1f} minutes)")
     
-    print(f"Created: {output_path}")
-    print(f"Size: {output_size:.1f} MB")
-    print(f"Duration: {total_duration:.1f} seconds ({total_duration/60:.1f} minutes)")
+    return [output_path for _, output_path in versions]
+
+def create_looped_video(input_path, output_path, loop_count=3):
+    """Create a looped version of the video"""
+    return create_looped_videos(input_path, [(loop_count, output_path)])[0]
 
 def main():
     input_file = "Halloween_Pumpkin_Projection_Video.mp4"
@@ -65,9 +80,7 @@ def main():
         (4, "Halloween_Pumpkin_Projection_Video_Extended.mp4")
     ]
     
-    for loop_count, output_file in versions:
-        create_looped_video(input_file, output_file, loop_count)
-        print()
+    create_looped_videos(input_file, versions)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -4,32 +4,49 @@ Master script to create the complete Halloween pumpkin projection video
 """
 
 import os
+import shutil
 import sys
 sys.path.append('scripts')
 
-from scripts.create_video import PumpkinVideoCreator
+from scripts.create_video_opencv import PumpkinVideoCreator
 from scripts.create_audio import create_complete_audio_track
+from scripts.render_cache import SegmentRenderCache, content_digest, source_digest
+from scripts.ffmpeg_utils import FFmpegWriter
+from create_extended_loop import create_looped_video
 from moviepy.editor import VideoFileClip, AudioFileClip, CompositeVideoClip
 
-def create_final_video():
-    """Create the final video with audio"""
-    print("🎃 Starting Halloween Pumpkin Projection Video Creation 🎃")
-    print("="*60)
-    
-    # Step 1: Create video
-    print("\n1. Creating animated video...")
-    creator = PumpkinVideoCreator(width=1920, height=1080, fps=24)
-    video_path = creator.create_video("temp_video.mp4")
-    
-    # Step 2: Create audio
-    print("\n2. Creating spooky audio track...")
-    audio_track = create_complete_audio_track()
+# Source files the synthesized audio track depends on
+AUDIO_SOURCES = ["create_audio.py", "synth.py"]
+
+def create_audio_file():
+    """Write the audio track, reused from the render cache while its synthesis code is unchanged"""
     audio_path = "audio/halloween_background.wav"
     os.makedirs("audio", exist_ok=True)
-    audio_track.export(audio_path, format="wav")
-    
-    # Step 3: Combine video and audio
-    print("\n3. Combining video and audio...")
+    cache = SegmentRenderCache()
+    audio_key = content_digest({"audio": source_digest(AUDIO_SOURCES)})
+    cached_audio = cache.lookup(audio_key, ".wav")
+    if cached_audio is None:
+        temp_audio = cache.temp_path_for(audio_key, ".wav")
+        create_complete_audio_track().export(temp_audio, format="wav")
+        cached_audio = cache.store(temp_audio, audio_key, ".wav")
+    else:
+        print("   Reusing cached audio track")
+    shutil.copyfile(cached_audio, audio_path)
+    return audio_path
+
+def render_and_mux(creator, audio_path, output_path):
+    """Pipe rendered frames and the audio into one H.264 encode (no temp video)"""
+    writer = FFmpegWriter(output_path, creator.width, creator.height, creator.fps,
+                          pix_fmt="bgr24", codec="libx264", audio_path=audio_path)
+    try:
+        for frame in creator.iter_frames():
+            writer.write(frame)
+    finally:
+        writer.release()
+    return writer.frame_count / creator.fps
+
+def mux_with_moviepy(video_path, audio_path, output_path):
+    """Legacy path: decode the temp video again and re-encode it with the audio"""
     video_clip = VideoFileClip(video_path)
     audio_clip = AudioFileClip(audio_path)
     
@@ -46,10 +63,6 @@ def create_final_video():
     # Combine
     final_video = video_clip.set_audio(audio_clip)
     
-    # Step 4: Export final video
-    output_path = "Halloween_Pumpkin_Projection_Video.mp4"
-    print(f"\n4. Exporting final video to {output_path}...")
-    
     final_video.write_videofile(
         output_path,
         fps=24,
@@ -59,9 +72,36 @@ def create_final_video():
         logger=None
     )
     
-    # Clean up temporary files
-    if os.path.exists(video_path):
-        os.remove(video_path)
+    return video_duration
+
+def create_final_video(pipeline=True):
+    """Create the final video with audio"""
+    print("🎃 Starting Halloween Pumpkin Projection Video Creation 🎃")
+    print("="*60)
+    
+    output_path = "Halloween_Pumpkin_Projection_Video.mp4"
+    
+    # Step 1: Create audio first; its loudness drives the mouths and the song pulse
+    print("\n1. Creating spooky audio track...")
+    audio_path = create_audio_file()
+    creator = PumpkinVideoCreator(width=1920, height=1080, fps=24, audio_path=audio_path)
+    
+    if pipeline:
+        # Step 2: Render straight into the final encoder
+        print(f"\n2. Rendering and encoding video to {output_path}...")
+        video_duration = render_and_mux(creator, audio_path, output_path)
+    else:
+        # Step 2: Create video
+        print("\n2. Creating animated video...")
+        video_path = creator.create_video("temp_video.mp4")
+        
+        # Step 3: Combine video and audio
+        print(f"\n3. Combining video and audio into {output_path}...")
+        video_duration = mux_with_moviepy(video_path, audio_path, output_path)
+        
+        # Clean up temporary files
+        if os.path.exists(video_path):
+            os.remove(video_path)
     
     print("\n" + "="*60)
     print("🎃 SUCCESS! Halloween Pumpkin Projection Video Complete! 🎃")
@@ -83,21 +123,11 @@ def create_looping_version(original_path, loop_count=3):
     """Create a longer looping version of the video"""
     print(f"\n5. Creating {loop_count}x looping version for extended playback...")
     
-    original_clip = VideoFileClip(original_path)
-    looped_clip = original_clip.loop(loop_count)
-    
+    # Container-level concatenation: no decode, no re-encode, audio kept
     loop_output_path = f"Halloween_Pumpkin_Projection_Video_{loop_count}x_Loop.mp4"
-    looped_clip.write_videofile(
-        loop_output_path,
-        fps=24,
-        codec='libx264',
-        audio_codec='aac',
-        verbose=False,
-        logger=None
-    )
+    create_looped_video(original_path, loop_output_path, loop_count)
     
     print(f"📁 Looped version saved as: {loop_output_path}")
-    print(f"⏱️  Total duration: {looped_clip.duration:.1f} seconds ({looped_clip.duration/60:.1f} minutes)")
     
     return loop_output_path
 
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Prepared pumpkin asset atlases cached on disk per resolution
+"""
+
+import cv2
+import numpy as np
+import os
+from render_cache import RENDER_CACHE_DIR, content_digest, file_digest, source_digest
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_DIR = os.path.dirname(SCRIPTS_DIR)
+ASSET_DIR = os.path.join(PROJECT_DIR, "assets")
+ATLAS_CACHE_DIR = os.path.join(RENDER_CACHE_DIR, "atlases")
+
+PUMPKIN_IDS = [1, 2]
+MOUTH_SHAPES = ["closed", "open_small", "open_medium", "open_wide", "singing"]
+
+# Bump when the atlas layout changes
+ATLAS_FORMAT_VERSION = 1
+
+# Supersampling factor when faces are rendered straight at the target size
+VECTOR_SUPERSAMPLE = 4
+
+def asset_path(pumpkin_id, mouth_shape, asset_dir=ASSET_DIR):
+    return os.path.join(asset_dir, f"pumpkin_{pumpkin_id}_{mouth_shape}.png")
+
+def asset_names():
+    """(pumpkin_id, mouth_shape) for every atlas slot, in order"""
+    return [(pumpkin_id, mouth_shape) for pumpkin_id in PUMPKIN_IDS for mouth_shape in MOUTH_SHAPES]
+
+def find_missing_assets(asset_dir=ASSET_DIR):
+    return [asset_path(pumpkin_id, mouth_shape, asset_dir)
+            for pumpkin_id, mouth_shape in asset_names()
+            if not os.path.exists(asset_path(pumpkin_id, mouth_shape, asset_dir))]
+
+def build_atlas(width, height, asset_dir=ASSET_DIR):
+    """Decode, resize and premultiply every asset into one (N, h, w, 4) uint16 array
+    
+    Channels 0-2 hold colour * alpha and channel 3 holds 255 - alpha, the layout
+    compositor.PremultipliedSprite blends from.
+    """
+    names = asset_names()
+    atlas = np.empty((len(names), height, width, 4), dtype=np.uint16)
+    
+    for index, (pumpkin_id, mouth_shape) in enumerate(names):
+        path = asset_path(pumpkin_id, mouth_shape, asset_dir)
+        img = cv2.imread(path, cv2.IMREAD_UNCHANGED)
+        if img is None:
+            raise ValueError(f"Could not decode pumpkin asset {path}")
+        if img.ndim == 2:
+            img = cv2.cvtColor(img, cv2.COLOR_GRAY2BGRA)
+        elif img.shape[2] == 3:
+            img = cv2.cvtColor(img, cv2.COLOR_BGR2BGRA)
+        
+        img = cv2.resize(img, (width, height))
+        alpha = img[:, :, 3:4].astype(np.uint16)
+        atlas[index, :, :, :3] = img[:, :, :3] * alpha
+        atlas[index, :, :, 3:4] = 255 - alpha
+    
+    return atlas
+
+def build_vector_atlas(width, height, supersample=VECTOR_SUPERSAMPLE):
+    """Render every face directly at width x height into the same layout as build_atlas"""
+    # Imported here because create_pumpkin_assets imports this module
+    from create_pumpkin_assets import (create_eyes_nose_layer, create_face_base,
+                                       downsample_premultiplied, draw_mouth)
+    
+    names = asset_names()
+    atlas = np.empty((len(names), height, width, 4), dtype=np.uint16)
+    base_id, base = None, None
+    eyes_nose = create_eyes_nose_layer(width * supersample, height * supersample)
+    
+    for index, (pumpkin_id, mouth_shape) in enumerate(names):
+        # Names are grouped by pumpkin, so only one supersampled base is alive at a time
+        if pumpkin_id != base_id:
+            base = None  # Free the previous pumpkin's base before drawing the next
+            base = create_face_base(width * supersample, height * supersample, pumpkin_id, eyes_nose)
+            base_id = pumpkin_id
+        face = downsample_premultiplied(draw_mouth(base, mouth_shape), supersample)
+        
+        alpha = np.rint(face[:, :, 3:4])
+        premul = np.minimum(np.rint(face[:, :, 2::-1]), alpha * 255)  # RGB -> BGR
+        atlas[index, :, :, :3] = premul
+        atlas[index, :, :, 3:4] = 255 - alpha
+    
+    return atlas
+
+def vector_atlas_key(width, height, supersample=VECTOR_SUPERSAMPLE):
+    """Hash of the face generator and the requested size"""
+    return content_digest({
+        "version": ATLAS_FORMAT_VERSION,
+        "size": [width, height],
+        "supersample": supersample,
+        "generator": source_digest(["create_pumpkin_assets.py"])
+    })
+
+def atlas_key(width, height, asset_dir=ASSET_DIR):
+    """Hash of everything the atlas depends on"""
+    return content_digest({
+        "version": ATLAS_FORMAT_VERSION,
+        "size": [width, height],
+        "assets": {os.path.basename(path): file_digest(path)
+                   for path in (asset_path(pumpkin_id, mouth_shape, asset_dir)
+                                for pumpkin_id, mouth_shape in asset_names())}
+    })
+
+def load_asset_atlas(width, height, source="vector", asset_dir=ASSET_DIR, cache_dir=ATLAS_CACHE_DIR):
+    """Return (atlas, key), memory-mapped from the on-disk cache when possible
+    
+    source="vector" draws the faces at exactly width x height; source="png"
+    resizes the PNGs in asset_dir and raises FileNotFoundError if any is
+    missing rather than rendering frames without pumpkins.
+    """
+    if source == "vector":
+        key = vector_atlas_key(width, height)
+        build = lambda: build_vector_atlas(width, height)
+    elif source == "png":
+        missing = find_missing_assets(asset_dir)
+        if missing:
+            raise FileNotFoundError(
+                "Missing pumpkin assets (run scripts/create_pumpkin_assets.py first):\n  "
+                + "\n  ".join(missing))
+        key = atlas_key(width, height, asset_dir)
+        build = lambda: build_atlas(width, height, asset_dir)
+    else:
+        raise ValueError(f"Unknown asset source: {source}")
+    
+    path = os.path.join(cache_dir, f"atlas_{source}_{width}x{height}_{key[:16]}.npy")
+    
+    if not os.path.exists(path):
+        os.makedirs(cache_dir, exist_ok=True)
+        temp_path = f"{path}.{os.getpid()}.tmp.npy"
+        np.save(temp_path, build())
+        os.replace(temp_path, path)
+    
+    return np.load(path, mmap_mode="r"), key
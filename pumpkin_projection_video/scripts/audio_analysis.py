@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Per-frame loudness envelope of the soundtrack, for driving the animation
+"""
+
+import sys
+import time
+import wave
+import numpy as np
+
+# Level reported for digital silence, so the dB scale stays finite
+DB_FLOOR = -100.0
+
+# Sample formats the stdlib wave module can hand us
+WAV_DTYPES = {1: np.uint8, 2: np.int16, 4: np.int32}
+
+def load_wav(path):
+    """(mono float32 samples in [-1, 1], sample rate) from a PCM WAV file"""
+    with wave.open(path, "rb") as wav:
+        sample_width = wav.getsampwidth()
+        channels = wav.getnchannels()
+        sample_rate = wav.getframerate()
+        data = wav.readframes(wav.getnframes())
+    
+    if sample_width not in WAV_DTYPES:
+        raise ValueError(f"Unsupported WAV sample width in {path}: {sample_width * 8} bits")
+    samples = np.frombuffer(data, dtype=WAV_DTYPES[sample_width]).astype(np.float32)
+    if sample_width == 1:
+        samples -= 128  # 8-bit WAV is unsigned
+    samples /= 2 ** (8 * sample_width - 1)
+    
+    if channels > 1:
+        samples = samples.reshape(-1, channels).mean(axis=1)
+    return samples, sample_rate
+
+def frame_bounds(sample_count, sample_rate, fps):
+    """Sample index where each video frame starts, plus the end of the last one
+    
+    Frame i starts at i * sample_rate / fps rounded half up, computed in integers so
+    the grid never drifts from the video, however long the track.
+    """
+    frame_count = -(-sample_count * fps // sample_rate)  # Last partial frame included
+    bounds = (2 * np.arange(frame_count + 1, dtype=np.int64) * sample_rate + fps) // (2 * fps)
+    return np.minimum(bounds, sample_count)
+
+def rms_envelope(samples, sample_rate, fps):
+    """RMS level of the samples under each video frame, in one vectorized pass
+    
+    Sums come from differences of a running total rather than np.add.reduceat,
+    which rejects a start index equal to len(samples) and reads one sample for
+    empty frames; rounding can leave the last frame empty, and it reads as
+    silence (DB_FLOOR once in dB).
+    """
+    if len(samples) == 0:
+        return np.zeros(0, dtype=np.float32)
+    bounds = frame_bounds(len(samples), sample_rate, fps)
+    counts = np.diff(bounds)
+    
+    totals = np.concatenate(([0.0], np.cumsum(np.square(samples, dtype=np.float64))))
+    energy = np.maximum(np.diff(totals[bounds]), 0)  # Cancellation can dip below 0
+    return np.sqrt(energy / np.maximum(counts, 1)).astype(np.float32)
+
+def to_db(envelope):
+    """RMS levels in dBFS, clamped at DB_FLOOR"""
+    return np.maximum(20 * np.log10(np.maximum(envelope, 1e-12)), DB_FLOOR).astype(np.float32)
+
+def median_window(levels_db, below=4.0, above=2.0):
+    """Map levels in dB to 0..1 over a window from below dB under to above dB
+    over their median, clipped
+    
+    A median and a fixed dB window rather than percentiles of the amplitude, so
+    a few loud events (the ambience's spooky tones sit some 34 dB over the
+    music) saturate only their own frames instead of squashing the rest to 0.
+    """
+    if len(levels_db) == 0:
+        return levels_db
+    reference = np.median(levels_db)
+    return np.clip((levels_db - (reference - below)) / (below + above), 0, 1).astype(np.float32)
+
+def smooth_envelope(envelope, frames=3):
+    """Moving average over the given number of frames (centred, same length)"""
+    if len(envelope) == 0 or frames <= 1:
+        return envelope
+    padded = np.pad(envelope, (frames // 2, frames - 1 - frames // 2), mode="edge")
+    return np.convolve(padded, np.full(frames, 1 / frames), mode="valid").astype(np.float32)
+
+def fit_envelope(envelope, frame_count):
+    """Loop or trim an envelope to frame_count frames
+    
+    Matches the mux, which loops the audio under a longer video (to within a
+    frame per loop).
+    """
+    if len(envelope) == 0:
+        return np.full(frame_count, DB_FLOOR, dtype=np.float32)
+    return np.resize(envelope, frame_count)
+
+def analyze_audio(path, fps=24):
+    """Per-frame loudness (dBFS) of a WAV file at the given frame rate"""
+    samples, sample_rate = load_wav(path)
+    return to_db(rms_envelope(samples, sample_rate, fps))
+
+if __name__ == "__main__":
+    path = sys.argv[1] if len(sys.argv) > 1 else "audio/halloween_background.wav"
+    start = time.perf_counter()
+    samples, sample_rate = load_wav(path)
+    loaded = time.perf_counter()
+    envelope = to_db(rms_envelope(samples, sample_rate, 24))
+    analyzed = time.perf_counter()
+    
+    duration = len(samples) / sample_rate
+    print(f"{path}: {duration:.1f}s of audio, {len(envelope)} frames at 24 fps")
+    print(f"Load: {loaded - start:.3f}s, analysis: {analyzed - loaded:.3f}s "
+          f"({duration / max(analyzed - start, 1e-9):.0f}x real time)")
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Precomputed background plates for the pumpkin video
+"""
+
+import numpy as np
+
+# Builders for each background effect, keyed by effect name
+BACKGROUND_EFFECTS = {}
+
+# Finished plates keyed by (effect, width, height)
+_plates = {}
+
+def background_effect(name):
+    """Register a function that builds the (height, width, 3) BGR plate for an effect"""
+    def register(builder):
+        BACKGROUND_EFFECTS[name] = builder
+        return builder
+    return register
+
+@background_effect("normal")
+def normal_plate(width, height):
+    """Standard dark background"""
+    return np.zeros((height, width, 3), dtype=np.uint8)
+
+@background_effect("spooky")
+def spooky_plate(width, height):
+    """Dark purple/black vertical gradient"""
+    intensity = (30 * (1 - np.arange(height) / height)).astype(np.uint8)
+    row_colors = np.zeros((height, 3), dtype=np.uint8)
+    row_colors[:, 0] = intensity + 10  # BGR format
+    row_colors[:, 2] = intensity
+    return np.ascontiguousarray(np.broadcast_to(row_colors[:, None, :], (height, width, 3)))
+
+def get_background_plate(effect, width, height):
+    """Return the shared read-only plate for an effect, building it on first use"""
+    if effect not in BACKGROUND_EFFECTS:
+        effect = "normal"
+
+    key = (effect, width, height)
+    plate = _plates.get(key)
+    if plate is None:
+        plate = BACKGROUND_EFFECTS[effect](width, height)
+        plate.flags.writeable = False
+        _plates[key] = plate
+    return plate
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Encode one rendered show to several resolutions and codecs at once
+"""
+
+import argparse
+import os
+import queue
+import threading
+import cv2
+import numpy as np
+from ffmpeg_utils import FFmpegWriter
+
+# Delivery targets: resolution plus the encoder settings that suit the player
+OUTPUT_PROFILES = {
+    "4k": {"width": 3840, "height": 2160, "codec": "libx265", "bitrate": "30M", "preset": "medium"},
+    "1080p": {"width": 1920, "height": 1080, "codec": "libx264", "bitrate": "10M", "preset": "medium"},
+    "720p": {"width": 1280, "height": 720, "codec": "libx264", "bitrate": "4M", "preset": "fast"},
+}
+
+# Marks the end of an output's queue
+_DONE = object()
+
+def resolve_profile(profile):
+    """A profile dict from a name in OUTPUT_PROFILES or a dict of its own"""
+    if isinstance(profile, str):
+        if profile not in OUTPUT_PROFILES:
+            raise ValueError(f"Unknown output profile: {profile} (choose from {', '.join(OUTPUT_PROFILES)})")
+        return OUTPUT_PROFILES[profile]
+    return profile
+
+class ScaledOutput:
+    """One encoder fed by its own thread, which downscales each source frame into a
+    private buffer before handing it to ffmpeg"""
+    
+    def __init__(self, path, profile, fps, audio_path=None):
+        self.path = path
+        self.profile = resolve_profile(profile)
+        self.size = (self.profile['width'], self.profile['height'])
+        self.scaled = np.empty((self.size[1], self.size[0], 3), dtype=np.uint8)
+        self.writer = FFmpegWriter(path, self.size[0], self.size[1], fps,
+                                   codec=self.profile.get('codec', "libx264"),
+                                   bitrate=self.profile.get('bitrate'),
+                                   preset=self.profile.get('preset', "medium"),
+                                   audio_path=audio_path)
+        self.frames = queue.Queue(maxsize=1)
+    
+    def scale(self, frame):
+        if frame.shape[:2] == self.scaled.shape[:2]:
+            np.copyto(self.scaled, frame)
+        else:
+            # Area averaging: the sharpest clean filter for downscaling
+            cv2.resize(frame, self.size, dst=self.scaled, interpolation=cv2.INTER_AREA)
+
+class MultiResolutionWriter:
+    """cv2.VideoWriter-style sink that fans every frame out to several ScaledOutputs
+    
+    write() returns as soon as every output has taken its scaled copy, so the
+    caller may reuse the frame while the encoders are still working on it; the
+    outputs scale and encode in parallel with each other and with rendering.
+    The first error in any output is re-raised from write() or release().
+    """
+    
+    def __init__(self, outputs, fps, audio_path=None):
+        self.outputs = []
+        try:
+            for path, profile in outputs.items():
+                self.outputs.append(ScaledOutput(path, profile, fps, audio_path))
+        except BaseException:
+            for output in self.outputs:
+                output.writer.release()
+            raise
+        
+        self.taken = queue.Queue()
+        self.error = None
+        self.error_lock = threading.Lock()
+        self.frame_count = 0
+        self.threads = [threading.Thread(target=self.output_worker, args=(output,),
+                                         name=f"output-{output.size[1]}p", daemon=True)
+                        for output in self.outputs]
+        for thread in self.threads:
+            thread.start()
+    
+    def fail(self, error):
+        with self.error_lock:
+            if self.error is None:
+                self.error = error
+    
+    def write(self, frame):
+        """Send one full-resolution frame to every output"""
+        if self.error is not None:
+            raise self.error
+        for output in self.outputs:
+            output.frames.put(frame)
+        for _ in self.outputs:
+            self.taken.get()
+        self.frame_count += 1
+    
+    def output_worker(self, output):
+        while True:
+            frame = output.frames.get()
+            if frame is _DONE:
+                return
+            if self.error is not None:
+                # Keep draining so write() never waits on a dead output
+                self.taken.put(None)
+                continue
+            try:
+                output.scale(frame)
+            except BaseException as error:
+                self.fail(error)
+                self.taken.put(None)
+                continue
+            self.taken.put(None)
+            try:
+                output.writer.write(output.scaled)
+            except BaseException as error:
+                self.fail(error)
+    
+    def isOpened(self):
+        return self.error is None and all(output.writer.isOpened() for output in self.outputs)
+    
+    def release(self):
+        """Flush every encoder and raise the first error from any of them"""
+        for output in self.outputs:
+            output.frames.put(_DONE)
+        for thread in self.threads:
+            thread.join()
+        for output in self.outputs:
+            try:
+                output.writer.release()
+            except BaseException as error:
+                self.fail(error)
+        if self.error is not None:
+            raise self.error
+
+def main():
+    from create_video_opencv import DEFAULT_SEED, PumpkinVideoCreator
+    
+    parser = argparse.ArgumentParser(description="Render the show once and encode it at several resolutions")
+    parser.add_argument("--profiles", nargs="+", choices=list(OUTPUT_PROFILES), default=list(OUTPUT_PROFILES))
+    parser.add_argument("--output-dir", default=".")
+    parser.add_argument("--name", default="Halloween_Pumpkin_Projection_Video")
+    parser.add_argument("--audio", default=None, help="WAV to mux in and drive the lip sync from")
+    parser.add_argument("--render-threads", type=int, default=2)
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    args = parser.parse_args()
+    
+    outputs = {os.path.join(args.output_dir, f"{args.name}_{profile}.mp4"): profile for profile in args.profiles}
+    width = max(OUTPUT_PROFILES[profile]['width'] for profile in args.profiles)
+    height = max(OUTPUT_PROFILES[profile]['height'] for profile in args.profiles)
+    
+    creator = PumpkinVideoCreator(width=width, height=height, fps=24, seed=args.seed, audio_path=args.audio)
+    creator.create_video_batch(outputs, render_threads=args.render_threads, audio_path=args.audio)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Time each stage of the render pipeline and compare against a stored baseline
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from itertools import islice
+import numpy as np
+from create_audio import create_complete_audio_track
+from create_video_opencv import PumpkinVideoCreator
+from dialogue_script import SONGS
+from ffmpeg_utils import FFMPEG, FFmpegWriter
+
+RESOLUTIONS = {
+    "720p": (1280, 720),
+    "1080p": (1920, 1080),
+    "4k": (3840, 2160)
+}
+
+MOUTH_SHAPES = ["closed", "open_small", "open_medium", "open_wide", "singing"]
+
+BENCHMARK_LINE = "Welcome, welcome, one and all, to our spooky pumpkin patch this Halloween night!"
+
+def time_stage(func, count, repeat, warmup=False):
+    """Best of `repeat` runs of func(), reported per unit of work"""
+    if warmup:
+        func()
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return {
+        "seconds": best,
+        "count": count,
+        "ms_per_unit": 1000 * best / count,
+        "per_second": count / best if best > 0 else float("inf")
+    }
+
+def mouth_pairs(count):
+    """A spread of (pumpkin1, pumpkin2) mouth combinations"""
+    return [(MOUTH_SHAPES[i % 5], MOUTH_SHAPES[(i // 5) % 5]) for i in range(count)]
+
+def benchmark_resolution(width, height, frames, repeat, audio_path=None, work_dir=None):
+    """Per-stage timings for one output size"""
+    results = {}
+    
+    # Asset load: build the atlas once so the timed runs measure the normal (cached) start-up
+    PumpkinVideoCreator(width, height, seed=0)
+    results["asset_load"] = time_stage(lambda: PumpkinVideoCreator(width, height, seed=0), 1, repeat)
+    creator = PumpkinVideoCreator(width, height, seed=0)
+    
+    # create_frame with the frame cache off, so every call is a full composite
+    pairs = mouth_pairs(frames)
+    cache_size = creator.frame_cache_size
+    creator.frame_cache_size = 0
+    for effect in ["normal", "spooky"]:
+        name = "create_frame_plain" if effect == "normal" else "create_frame_spooky"
+        results[name] = time_stage(
+            lambda: [creator.create_frame(p1, p2, effect, frame_index=i) for i, (p1, p2) in enumerate(pairs)],
+            frames, repeat)
+    creator.frame_cache_size = cache_size
+    
+    # overlay_image_alpha with a straight (non-premultiplied) BGRA overlay
+    sprite = creator.pumpkin_sprites[1]["open_wide"]
+    alpha = 255 - np.asarray(sprite.inv_alpha)
+    overlay = np.concatenate([np.asarray(sprite.premul) // np.maximum(alpha, 1), alpha], axis=2).astype(np.uint8)
+    frame = np.zeros((height, width, 3), dtype=np.uint8)
+    results["overlay_image_alpha"] = time_stage(
+        lambda: [creator.overlay_image_alpha(frame, overlay, 50, 100) for _ in range(frames)],
+        frames, repeat)
+    
+    # The animation generators, with a warm frame cache as in a real render
+    line_seconds = frames / creator.fps
+    results["animate_dialogue_line"] = time_stage(
+        lambda: sum(1 for _ in creator.animate_dialogue_line(1, BENCHMARK_LINE, line_seconds)),
+        frames, repeat, warmup=True)
+    results["animate_song"] = time_stage(
+        lambda: sum(1 for _ in islice(creator.animate_song(SONGS[0]), frames)),
+        frames, repeat, warmup=True)
+    
+    if work_dir is None:
+        return results
+    
+    # Encoding: the same frames written straight through ffmpeg, then with the audio muxed in
+    rendered = list(islice(creator.animate_song(SONGS[0]), frames))
+    
+    def encode(audio):
+        writer = FFmpegWriter(os.path.join(work_dir, f"benchmark_{width}x{height}.mp4"),
+                              width, height, creator.fps, audio_path=audio)
+        try:
+            for frame in rendered:
+                writer.write(frame)
+        finally:
+            writer.release()
+    
+    results["encoder_write"] = time_stage(lambda: encode(None), frames, repeat)
+    if audio_path:
+        results["final_mux"] = time_stage(lambda: encode(audio_path), frames, repeat)
+    
+    return results
+
+def run_benchmarks(resolutions, frames=48, repeat=3, audio_seconds=30, encode=True):
+    """Run every stage and return the flat {"<resolution>/<stage>": timing} result dict"""
+    results = {}
+    work_dir = tempfile.mkdtemp(prefix="pumpkin_benchmark_") if encode else None
+    
+    try:
+        audio_path = None
+        audio_minutes = audio_seconds / 60
+        timing = time_stage(lambda: create_complete_audio_track(audio_minutes), 1, repeat)
+        timing["audio_seconds"] = audio_seconds
+        results["audio/create_complete_audio_track"] = timing
+        
+        if work_dir:
+            audio_path = os.path.join(work_dir, "benchmark_audio.wav")
+            create_complete_audio_track(audio_minutes).export(audio_path, format="wav")
+        
+        for name in resolutions:
+            width, height = RESOLUTIONS[name]
+            print(f"Benchmarking {name} ({width}x{height})...")
+            for stage, timing in benchmark_resolution(width, height, frames, repeat,
+                                                      audio_path, work_dir).items():
+                results[f"{name}/{stage}"] = timing
+    finally:
+        if work_dir:
+            shutil.rmtree(work_dir, ignore_errors=True)
+    
+    return results
+
+def compare_to_baseline(results, baseline, threshold):
+    """Stages whose time per unit grew by more than threshold (a fraction) over the baseline"""
+    regressions = []
+    for name, timing in results.items():
+        if name not in baseline:
+            continue
+        before = baseline[name]["ms_per_unit"]
+        after = timing["ms_per_unit"]
+        if before > 0 and after > before * (1 + threshold):
+            regressions.append((name, before, after))
+    return regressions
+
+def print_results(results):
+    print(f"\n{'stage':<45} {'ms/unit':>10} {'units/s':>10}")
+    for name, timing in results.items():
+        print(f"{name:<45} {timing['ms_per_unit']:>10.2f} {timing['per_second']:>10.1f}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the pumpkin render pipeline")
+    parser.add_argument("--resolutions", nargs="+", choices=list(RESOLUTIONS), default=list(RESOLUTIONS))
+    parser.add_argument("--frames", type=int, default=48, help="frames per timed stage")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per stage, the best one is kept")
+    parser.add_argument("--audio-seconds", type=float, default=30)
+    parser.add_argument("--no-encode", action="store_true", help="skip the ffmpeg encoder and mux stages")
+    parser.add_argument("--output", default="benchmark_results.json")
+    parser.add_argument("--baseline", help="results JSON from an earlier run to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="allowed slowdown per stage as a fraction (0.2 = 20%%)")
+    args = parser.parse_args()
+    
+    encode = not args.no_encode
+    if encode and shutil.which(FFMPEG) is None:
+        print(f"{FFMPEG} not found - skipping the encoder and mux stages")
+        encode = False
+    
+    results = run_benchmarks(args.resolutions, args.frames, args.repeat, args.audio_seconds, encode)
+    print_results(results)
+    
+    with open(args.output, "w") as f:
+        json.dump({"frames": args.frames, "repeat": args.repeat, "results": results}, f, indent=2)
+    print(f"\nResults saved as {args.output}")
+    
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+        regressions = compare_to_baseline(results, baseline, args.threshold)
+        if regressions:
+            print(f"\nRegressions beyond {args.threshold:.0%}:")
+            for name, before, after in regressions:
+                print(f"  {name}: {before:.2f} -> {after:.2f} ms/unit ({after / before - 1:+.0%})")
+            sys.exit(1)
+        print(f"No stage regressed beyond {args.threshold:.0%} of {args.baseline}")
+
+if __name__ == "__main__":
+    main()
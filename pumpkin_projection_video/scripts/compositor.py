@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Fixed-point alpha compositor for pumpkin sprites
+"""
+
+import numpy as np
+
+class PremultipliedSprite:
+    """An RGBA image premultiplied once so it can be blended with integer math"""
+
+    def __init__(self, premul, inv_alpha):
+        # premul holds colour * alpha (0..65025), inv_alpha holds 255 - alpha
+        self.premul = premul
+        self.inv_alpha = inv_alpha
+        self.height, self.width = premul.shape[:2]
+
+    @classmethod
+    def from_rgba(cls, img):
+        """Premultiply a 4-channel uint8 image (BGRA or RGBA)"""
+        alpha = img[:, :, 3:4].astype(np.uint16)
+        premul = img[:, :, :3].astype(np.uint16) * alpha
+        inv_alpha = 255 - alpha
+        return cls(premul, inv_alpha)
+
+class AlphaCompositor:
+    """Blend premultiplied sprites into uint8 frames without per-frame allocations"""
+
+    def __init__(self, max_height, max_width):
+        # Two uint16 scratch planes cover the largest sprite we will ever blend
+        self.scratch = np.empty((max_height, max_width, 3), dtype=np.uint16)
+        self.scratch_hi = np.empty((max_height, max_width, 3), dtype=np.uint16)
+
+    def ensure_capacity(self, height, width):
+        """Grow the scratch planes if a sprite is larger than expected"""
+        if height > self.scratch.shape[0] or width > self.scratch.shape[1]:
+            height = max(height, self.scratch.shape[0])
+            width = max(width, self.scratch.shape[1])
+            self.scratch = np.empty((height, width, 3), dtype=np.uint16)
+            self.scratch_hi = np.empty((height, width, 3), dtype=np.uint16)
+
+    def blend(self, dst, sprite, x, y, rect=None):
+        """Blend sprite into dst (uint8, 3 channels) with its top-left at (x, y)
+
+        rect=(top, bottom, left, right) in sprite pixels blends only that
+        rectangle of the sprite.
+        """
+        top, bottom, left, right = rect if rect is not None else (0, sprite.height, 0, sprite.width)
+        y1, y2 = max(0, y + top), min(dst.shape[0], y + bottom)
+        x1, x2 = max(0, x + left), min(dst.shape[1], x + right)
+
+        if y1 >= y2 or x1 >= x2:
+            return dst
+
+        y1_o, x1_o = y1 - y, x1 - x
+        h, w = y2 - y1, x2 - x1
+        self.ensure_capacity(h, w)
+
+        region = dst[y1:y2, x1:x2]
+        acc = self.scratch[:h, :w]
+        hi = self.scratch_hi[:h, :w]
+
+        # acc = fg * a + bg * (255 - a), at most 255 * 255 so it fits in uint16
+        np.multiply(region, sprite.inv_alpha[y1_o:y1_o + h, x1_o:x1_o + w], out=acc)
+        np.add(acc, sprite.premul[y1_o:y1_o + h, x1_o:x1_o + w], out=acc)
+
+        # Rounded division by 255: (v + 128 + ((v + 128) >> 8)) >> 8
+        np.add(acc, 128, out=acc)
+        np.right_shift(acc, 8, out=hi)
+        np.add(acc, hi, out=acc)
+        np.right_shift(acc, 8, out=acc)
+
+        np.copyto(region, acc, casting='unsafe')
+        return dst
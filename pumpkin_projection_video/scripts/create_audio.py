@@ -4,65 +4,86 @@ Create basic audio track for the pumpkin video
 """
 
 import numpy as np
-from pydub import AudioSegment
-from pydub.generators import Sine, WhiteNoise
 import os
+from synth import (StreamingLowPass, apply_fades, db_to_gain, mix_into, ms_to_samples, sine,
+                   spooky_tone, to_audio_segment)
 
 def create_spooky_tone(frequency, duration_ms, fade_in=100, fade_out=100):
     """Create a spooky tone with harmonics"""
-    # Base tone
-    tone = Sine(frequency).to_audio_segment(duration=duration_ms)
-    
-    # Add harmonics for spookier sound
-    harmonic1 = Sine(frequency * 1.5).to_audio_segment(duration=duration_ms) - 20
-    harmonic2 = Sine(frequency * 2).to_audio_segment(duration=duration_ms) - 30
-    
-    # Mix harmonics
-    spooky_tone = tone.overlay(harmonic1).overlay(harmonic2)
-    
-    # Apply fades
-    spooky_tone = spooky_tone.fade_in(fade_in).fade_out(fade_out)
-    
-    return spooky_tone
+    # Base tone with a fifth and an octave mixed in, rendered in one NumPy buffer
+    tone = spooky_tone(frequency, ms_to_samples(duration_ms),
+                       ms_to_samples(fade_in), ms_to_samples(fade_out))
+    return to_audio_segment(tone)
+
+def iter_background_ambience(duration_minutes=8.5, block_ms=1000, seed=None):
+    """Yield spooky ambience as fixed-size float32 blocks
+    
+    Wind is filtered block by block with carried-over filter state, and spooky
+    tones are scheduled one 15-second window ahead and mixed only into the
+    blocks they overlap. Memory use does not depend on the duration; pass
+    duration_minutes=None for endless ambience.
+    """
+    rng = np.random.default_rng(seed)
+    duration_ms = int(duration_minutes * 60 * 1000) if duration_minutes is not None else None
+    total_samples = ms_to_samples(duration_ms) if duration_ms is not None else None
+    block_size = ms_to_samples(block_ms)
+    window_ms = 15000  # Chance of a spooky tone every 15 seconds
+    
+    wind_filter = StreamingLowPass(800)
+    wind_gain = db_to_gain(-25)
+    active_tones = []  # (start sample, samples)
+    next_window_ms = 0
+    position = 0
+    
+    while total_samples is None or position < total_samples:
+        block_len = block_size if total_samples is None else min(block_size, total_samples - position)
+        block_end = position + block_len
+        
+        # Schedule tones for every window that starts before this block ends
+        while ms_to_samples(next_window_ms) < block_end:
+            if rng.random() > 0.7:  # 30% chance
+                # Random spooky tone at a random position within the 15-second window
+                freq = rng.choice([100, 150, 200, 250])
+                tone_duration = rng.integers(1000, 3000)
+                remaining_ms = 10000 if duration_ms is None else min(10000, duration_ms - next_window_ms)
+                tone_ms = next_window_ms + rng.integers(0, max(remaining_ms, 1))
+                tone = spooky_tone(freq, ms_to_samples(tone_duration), ms_to_samples(100), ms_to_samples(100))
+                active_tones.append((ms_to_samples(tone_ms), tone))
+            next_window_ms += window_ms
+        
+        # Base wind: filtered white noise, quieter than the music
+        noise = rng.uniform(-1, 1, block_len).astype(np.float32) * wind_gain
+        block = wind_filter.process(noise)
+        
+        # Mix in only the tones that overlap this block
+        still_active = []
+        for tone_start, tone in active_tones:
+            if tone_start < block_end:
+                mix_into(block, tone, tone_start - position)
+            if tone_start + len(tone) > block_end:
+                still_active.append((tone_start, tone))
+        active_tones = still_active
+        
+        yield block
+        position = block_end
 
-def create_wind_sound(duration_ms):
-    """Create wind sound effect"""
-    # Generate white noise and filter it
-    wind = WhiteNoise().to_audio_segment(duration=duration_ms)
+def render_background_ambience(duration_minutes=8.5):
+    """Spooky background ambience as one float32 buffer"""
+    ambience = np.empty(ms_to_samples(int(duration_minutes * 60 * 1000)), dtype=np.float32)
     
-    # Apply low-pass filter effect by reducing high frequencies
-    wind = wind - 25  # Reduce volume
-    wind = wind.low_pass_filter(800)  # Filter high frequencies
+    position = 0
+    for block in iter_background_ambience(duration_minutes):
+        ambience[position:position + len(block)] = block
+        position += len(block)
     
-    return wind
+    return ambience
 
 def create_background_ambience(duration_minutes=8.5):
     """Create spooky background ambience"""
-    duration_ms = int(duration_minutes * 60 * 1000)
-    
-    # Base wind sound
-    wind = create_wind_sound(duration_ms)
-    
-    # Add occasional spooky tones
-    ambience = wind
-    
-    # Add random spooky sounds throughout
-    for i in range(0, duration_ms, 15000):  # Every 15 seconds
-        if np.random.random() > 0.7:  # 30% chance
-            # Random spooky tone
-            freq = np.random.choice([100, 150, 200, 250])
-            tone_duration = np.random.randint(1000, 3000)
-            spooky_tone = create_spooky_tone(freq, tone_duration)
-            
-            # Random position within the 15-second window
-            position = i + np.random.randint(0, min(10000, duration_ms - i))
-            if position < duration_ms:
-                ambience = ambience.overlay(spooky_tone, position=position)
-    
-    return ambience
+    return to_audio_segment(render_background_ambience(duration_minutes))
 
-def create_simple_music_track(duration_minutes=8.5):
-    """Create a simple musical background"""
+def render_simple_music_track(duration_minutes=8.5):
+    """Simple musical background as one float32 buffer"""
     duration_ms = int(duration_minutes * 60 * 1000)
     
     # Create a simple chord progression in a minor key
@@ -75,60 +96,53 @@ def create_simple_music_track(duration_minutes=8.5):
     }
     
     chord_progression = ['Am', 'F', 'C', 'G']
-    chord_duration = 4000  # 4 seconds per chord
-    
-    music = AudioSegment.silent(duration=100)  # Start with silence
-    
-    current_pos = 0
-    while current_pos < duration_ms:
-        for chord_name in chord_progression:
-            if current_pos >= duration_ms:
-                break
-                
-            # Create chord
-            chord_tones = []
-            for freq in chord_notes[chord_name]:
-                tone = Sine(freq).to_audio_segment(duration=chord_duration)
-                tone = tone - 25  # Reduce volume
-                tone = tone.fade_in(200).fade_out(200)
-                chord_tones.append(tone)
-            
-            # Mix chord tones
-            chord = chord_tones[0]
-            for tone in chord_tones[1:]:
-                chord = chord.overlay(tone)
-            
-            # Add to music track
-            if len(music) <= current_pos:
-                music += AudioSegment.silent(duration=current_pos - len(music))
-                music += chord
-            else:
-                music = music.overlay(chord, position=current_pos)
-            
-            current_pos += chord_duration
-    
-    return music[:duration_ms]  # Trim to exact duration
+    chord_duration = ms_to_samples(4000)  # 4 seconds per chord
+    fade = ms_to_samples(200)
+    
+    # Each chord is synthesized once, then copied into its slots
+    chords = {}
+    for chord_name, freqs in chord_notes.items():
+        chord = np.zeros(chord_duration, dtype=np.float32)
+        for freq in freqs:
+            chord += apply_fades(sine(freq, chord_duration, gain_db=-25), fade, fade)
+        chords[chord_name] = chord
+    
+    # Mix everything into one preallocated buffer
+    music = np.zeros(ms_to_samples(duration_ms), dtype=np.float32)
+    for slot, current_pos in enumerate(range(0, len(music), chord_duration)):
+        chord_name = chord_progression[slot % len(chord_progression)]
+        mix_into(music, chords[chord_name], current_pos)
+    
+    return music
 
-def create_complete_audio_track():
+def create_simple_music_track(duration_minutes=8.5):
+    """Create a simple musical background"""
+    return to_audio_segment(render_simple_music_track(duration_minutes))
+
+def normalize_peak(buffer, headroom_db=0.1):
+    """Scale a float buffer in place so its peak sits headroom_db under full scale
+    
+    Same target as pydub's AudioSegment.normalize(); silence is left as is.
+    """
+    peak = np.max(np.abs(buffer)) if len(buffer) else 0.0
+    if peak > 0:
+        buffer *= np.float32(db_to_gain(-headroom_db) / peak)
+    return buffer
+
+def create_complete_audio_track(duration_minutes=8.5):
     """Create the complete audio track for the video"""
     print("Creating background ambience...")
-    ambience = create_background_ambience()
+    ambience = render_background_ambience(duration_minutes)
     
     print("Creating simple music track...")
-    music = create_simple_music_track()
+    music = render_simple_music_track(duration_minutes)
     
-    # Mix ambience and music
+    # Mix ambience and music in float, with the music quieter than the ambience
     print("Mixing audio tracks...")
-    # Make music quieter than ambience
-    music = music - 15
-    
-    # Combine tracks
-    final_audio = ambience.overlay(music)
-    
-    # Normalize audio
-    final_audio = final_audio.normalize()
+    mixed = mix_into(ambience, music * np.float32(db_to_gain(-15)), 0)
     
-    return final_audio
+    # Normalize, then round to 16 bits once for export
+    return to_audio_segment(normalize_peak(mixed))
 
 def main():
     os.makedirs("audio", exist_ok=True)
@@ -7,13 +7,79 @@ import cv2
 import numpy as np
 from PIL import Image, ImageDraw, ImageFont
 import os
+import json
+from concurrent.futures import ProcessPoolExecutor
+from asset_cache import ASSET_DIR, asset_path
+from render_cache import content_digest, source_digest
 
-def create_pumpkin_face(width=800, height=600, pumpkin_id=1, mouth_shape="closed"):
-    """Create a pumpkin face with different expressions"""
+# Bump to force regeneration when drawing output changes in a way the source hash misses
+GENERATOR_VERSION = 1
+MANIFEST_NAME = ".manifest.json"
+
+# Faces are designed on an 800x600 canvas and scaled to whatever size is requested
+DESIGN_WIDTH = 800
+DESIGN_HEIGHT = 600
+
+def pumpkin_geometry():
+    """Positions and sizes shared by every layer, in design-canvas pixels"""
+    pumpkin_x = DESIGN_WIDTH // 4
+    pumpkin_y = DESIGN_HEIGHT // 6
+    pumpkin_w = DESIGN_WIDTH // 2
+    pumpkin_h = DESIGN_HEIGHT * 2 // 3
     
-    # Create black background
-    img = Image.new('RGBA', (width, height), (0, 0, 0, 0))
-    draw = ImageDraw.Draw(img)
+    eye_y = pumpkin_y + pumpkin_h // 3
+    eye_size = 60
+    
+    nose_x = pumpkin_x + pumpkin_w // 2
+    nose_y = eye_y + eye_size + 20
+    nose_size = 30
+    
+    return {
+        "pumpkin_x": pumpkin_x, "pumpkin_y": pumpkin_y,
+        "pumpkin_w": pumpkin_w, "pumpkin_h": pumpkin_h,
+        "eye_y": eye_y, "eye_size": eye_size,
+        "nose_x": nose_x, "nose_y": nose_y, "nose_size": nose_size,
+        "mouth_x": nose_x, "mouth_y": nose_y + nose_size + 30,
+        "mouth_width": 120, "mouth_height": 40
+    }
+
+class ScaledDraw:
+    """ImageDraw wrapper that maps design-canvas coordinates onto the real canvas"""
+    
+    def __init__(self, img):
+        self.draw = ImageDraw.Draw(img)
+        self.sx = img.width / DESIGN_WIDTH
+        self.sy = img.height / DESIGN_HEIGHT
+        self.unscaled = self.sx == 1 and self.sy == 1
+    
+    def _points(self, points):
+        if self.unscaled:
+            return points
+        return [(x * self.sx, y * self.sy) for x, y in points]
+    
+    def _box(self, box):
+        if self.unscaled:
+            return box
+        x0, y0, x1, y1 = box
+        return [x0 * self.sx, y0 * self.sy, x1 * self.sx, y1 * self.sy]
+    
+    def _width(self, width):
+        if self.unscaled:
+            return width
+        return max(1, round(width * (self.sx + self.sy) / 2))
+    
+    def ellipse(self, box, fill=None, outline=None, width=1):
+        self.draw.ellipse(self._box(box), fill=fill, outline=outline, width=self._width(width))
+    
+    def polygon(self, points, fill=None, outline=None, width=1):
+        self.draw.polygon(self._points(points), fill=fill, outline=outline, width=self._width(width))
+    
+    def line(self, points, fill=None, width=1):
+        self.draw.line(self._points(points), fill=fill, width=self._width(width))
+
+def create_body_layer(width, height, pumpkin_id):
+    """Glow and segmented body - depends only on pumpkin_id"""
+    g = pumpkin_geometry()
     
     # Pumpkin colors - different for each pumpkin
     if pumpkin_id == 1:
@@ -23,56 +89,79 @@ def create_pumpkin_face(width=800, height=600, pumpkin_id=1, mouth_shape="closed
         pumpkin_color = (255, 120, 0)  # Slightly different orange
         glow_color = (255, 140, 0, 100)
     
-    # Pumpkin body (oval shape)
-    pumpkin_x = width // 4
-    pumpkin_y = height // 6
-    pumpkin_w = width // 2
-    pumpkin_h = height * 2 // 3
+    # Create black background
+    img = Image.new('RGBA', (width, height), (0, 0, 0, 0))
+    draw = ScaledDraw(img)
     
     # Draw pumpkin with segments
     for i in range(5):
-        segment_width = pumpkin_w // 5
+        segment_width = g["pumpkin_w"] // 5
         x_offset = i * segment_width
         draw.ellipse([
-            pumpkin_x + x_offset, pumpkin_y,
-            pumpkin_x + x_offset + segment_width + 20, pumpkin_y + pumpkin_h
+            g["pumpkin_x"] + x_offset, g["pumpkin_y"],
+            g["pumpkin_x"] + x_offset + segment_width + 20, g["pumpkin_y"] + g["pumpkin_h"]
         ], fill=pumpkin_color, outline=(200, 100, 0), width=2)
     
-    # Eyes
-    eye_y = pumpkin_y + pumpkin_h // 3
-    eye_size = 60
+    # Add some glow effect around the pumpkin
+    glow_img = Image.new('RGBA', (width, height), (0, 0, 0, 0))
+    glow_draw = ScaledDraw(glow_img)
     
-    # Left eye (triangle)
-    left_eye_x = pumpkin_x + pumpkin_w // 3
-    draw.polygon([
-        (left_eye_x, eye_y),
-        (left_eye_x - eye_size//2, eye_y + eye_size),
-        (left_eye_x + eye_size//2, eye_y + eye_size)
-    ], fill=(0, 0, 0), outline=(255, 255, 0), width=3)
+    for i in range(10):
+        alpha = max(0, 50 - i * 5)
+        glow_draw.ellipse([
+            g["pumpkin_x"] - i*3, g["pumpkin_y"] - i*3,
+            g["pumpkin_x"] + g["pumpkin_w"] + i*3, g["pumpkin_y"] + g["pumpkin_h"] + i*3
+        ], fill=(*glow_color[:3], alpha))
     
-    # Right eye (triangle)
-    right_eye_x = pumpkin_x + 2 * pumpkin_w // 3
-    draw.polygon([
-        (right_eye_x, eye_y),
-        (right_eye_x - eye_size//2, eye_y + eye_size),
-        (right_eye_x + eye_size//2, eye_y + eye_size)
-    ], fill=(0, 0, 0), outline=(255, 255, 0), width=3)
+    # Composite glow with main image
+    return Image.alpha_composite(glow_img, img)
+
+def create_eyes_nose_layer(width, height):
+    """Triangle eyes and nose - the same for both pumpkins"""
+    g = pumpkin_geometry()
+    img = Image.new('RGBA', (width, height), (0, 0, 0, 0))
+    draw = ScaledDraw(img)
+    
+    eye_y, eye_size = g["eye_y"], g["eye_size"]
+    
+    # Left and right eyes (triangles)
+    for eye_x in (g["pumpkin_x"] + g["pumpkin_w"] // 3, g["pumpkin_x"] + 2 * g["pumpkin_w"] // 3):
+        draw.polygon([
+            (eye_x, eye_y),
+            (eye_x - eye_size//2, eye_y + eye_size),
+            (eye_x + eye_size//2, eye_y + eye_size)
+        ], fill=(0, 0, 0), outline=(255, 255, 0), width=3)
     
     # Nose (small triangle)
-    nose_x = pumpkin_x + pumpkin_w // 2
-    nose_y = eye_y + eye_size + 20
-    nose_size = 30
+    nose_x, nose_y, nose_size = g["nose_x"], g["nose_y"], g["nose_size"]
     draw.polygon([
         (nose_x, nose_y),
         (nose_x - nose_size//2, nose_y + nose_size),
         (nose_x + nose_size//2, nose_y + nose_size)
     ], fill=(0, 0, 0), outline=(255, 255, 0), width=2)
     
+    return img
+
+def create_face_base(width, height, pumpkin_id, eyes_nose=None):
+    """Body, glow, eyes and nose - everything except the mouth
+    
+    Pass the create_eyes_nose_layer() for this size to share it between pumpkins.
+    """
+    if eyes_nose is None:
+        eyes_nose = create_eyes_nose_layer(width, height)
+    return Image.alpha_composite(create_body_layer(width, height, pumpkin_id), eyes_nose)
+
+def draw_mouth(img, mouth_shape):
+    """Draw a mouth shape onto a copy of the face base"""
+    g = pumpkin_geometry()
+    img = img.copy()
+    draw = ScaledDraw(img)
+    
     # Mouth - different shapes for animation
-    mouth_x = pumpkin_x + pumpkin_w // 2
-    mouth_y = nose_y + nose_size + 30
-    mouth_width = 120
-    mouth_height = 40
+    mouth_x = g["mouth_x"]
+    mouth_y = g["mouth_y"]
+    mouth_width = g["mouth_width"]
+    mouth_height = g["mouth_height"]
     
     if mouth_shape == "closed":
         # Closed mouth - thin line
@@ -113,35 +202,111 @@ def create_pumpkin_face(width=800, height=600, pumpkin_id=1, mouth_shape="closed
             mouth_x + mouth_width//3, mouth_y + mouth_height//2
         ], fill=(0, 0, 0), outline=(255, 255, 0), width=3)
     
-    # Add some glow effect around the pumpkin
-    glow_img = Image.new('RGBA', (width, height), (0, 0, 0, 0))
-    glow_draw = ImageDraw.Draw(glow_img)
+    return img
+
+def downsample_premultiplied(img, factor, strip_rows=64):
+    """Box-filter a supersampled RGBA image, strip_rows output rows at a time
     
-    for i in range(10):
-        alpha = max(0, 50 - i * 5)
-        glow_draw.ellipse([
-            pumpkin_x - i*3, pumpkin_y - i*3,
-            pumpkin_x + pumpkin_w + i*3, pumpkin_y + pumpkin_h + i*3
-        ], fill=(*glow_color[:3], alpha))
+    Returns a float32 (h, w, 4) array holding colour * alpha (0..65025) in the
+    first three channels and alpha (0..255) in the last, averaged in
+    premultiplied space so edges don't pick up dark fringes. Each strip is
+    summed in uint32 over a reshaped view, so apart from img itself memory
+    stays at the output size however large the supersample factor.
+    """
+    height, width = img.height // factor, img.width // factor
+    out = np.empty((height, width, 4), dtype=np.float32)
     
-    # Composite glow with main image
-    final_img = Image.alpha_composite(glow_img, img)
+    for top in range(0, height, strip_rows):
+        rows = min(strip_rows, height - top)
+        strip = np.asarray(img.crop((0, top * factor, width * factor, (top + rows) * factor)),
+                           dtype=np.uint32)
+        strip[..., :3] *= strip[..., 3:4]
+        sums = strip.reshape(rows, factor, width, factor, 4).sum(axis=(1, 3), dtype=np.uint32)
+        np.divide(sums, factor * factor, out=out[top:top + rows], dtype=np.float32)
     
-    return final_img
+    return out
+
+def unpremultiply(premul):
+    """Turn downsample_premultiplied output back into a straight-alpha RGBA image"""
+    alpha = premul[..., 3:4]
+    rgb = np.divide(premul[..., :3], alpha, out=np.zeros_like(premul[..., :3]), where=alpha > 0)
+    rgba = np.concatenate([rgb, alpha], axis=2)
+    return Image.fromarray(np.clip(np.rint(rgba), 0, 255).astype(np.uint8), 'RGBA')
+
+def render_face(base, mouth_shape, supersample=1):
+    """Finish a (possibly supersampled) face base with a mouth, at final size"""
+    img = draw_mouth(base, mouth_shape)
+    if supersample > 1:
+        img = unpremultiply(downsample_premultiplied(img, supersample))
+    return img
 
-def create_all_pumpkin_assets():
-    """Create all pumpkin face variations"""
+def create_pumpkin_face(width=800, height=600, pumpkin_id=1, mouth_shape="closed", supersample=1):
+    """Create a pumpkin face with different expressions
     
-    os.makedirs("pumpkin_projection_video/assets", exist_ok=True)
+    The face is drawn directly at width x height. With supersample > 1 it is
+    drawn that many times larger and box-filtered down for anti-aliasing.
+    """
+    base = create_face_base(width * supersample, height * supersample, pumpkin_id)
+    return render_face(base, mouth_shape, supersample)
+
+def asset_params(width, height, pumpkin_id, mouth_shape, supersample=1):
+    """Everything that determines an asset's pixels"""
+    return content_digest({
+        "version": GENERATOR_VERSION,
+        "source": source_digest(["create_pumpkin_assets.py"]),
+        "size": [width, height],
+        "supersample": supersample,
+        "pumpkin_id": pumpkin_id,
+        "mouth_shape": mouth_shape
+    })
+
+def _render_mouth_variant(job):
+    base, mouth_shape, supersample, filename = job
+    render_face(base, mouth_shape, supersample).save(filename)
+    return filename
+
+def create_all_pumpkin_assets(width=800, height=600, workers=None, force=False, supersample=1):
+    """Create all pumpkin face variations, skipping ones that are already up to date"""
+    
+    os.makedirs(ASSET_DIR, exist_ok=True)
     
     mouth_shapes = ["closed", "open_small", "open_medium", "open_wide", "singing"]
     
+    manifest_path = os.path.join(ASSET_DIR, MANIFEST_NAME)
+    manifest = {}
+    if os.path.exists(manifest_path) and not force:
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+    
+    jobs = []
+    params = {}
+    bases = {}
+    eyes_nose = None
     for pumpkin_id in [1, 2]:
         for mouth_shape in mouth_shapes:
-            img = create_pumpkin_face(pumpkin_id=pumpkin_id, mouth_shape=mouth_shape)
-            filename = f"pumpkin_projection_video/assets/pumpkin_{pumpkin_id}_{mouth_shape}.png"
-            img.save(filename)
-            print(f"Created: {filename}")
+            filename = asset_path(pumpkin_id, mouth_shape)
+            name = os.path.basename(filename)
+            params[name] = asset_params(width, height, pumpkin_id, mouth_shape, supersample)
+            if manifest.get(name) == params[name] and os.path.exists(filename):
+                print(f"Up to date: {filename}")
+                continue
+            
+            # The body, glow, eyes and nose are shared by every mouth variant, and the
+            # eyes and nose by both pumpkins
+            if pumpkin_id not in bases:
+                if eyes_nose is None:
+                    eyes_nose = create_eyes_nose_layer(width * supersample, height * supersample)
+                bases[pumpkin_id] = create_face_base(width * supersample, height * supersample,
+                                                     pumpkin_id, eyes_nose)
+            jobs.append((bases[pumpkin_id], mouth_shape, supersample, filename))
+    
+    if jobs:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for filename in pool.map(_render_mouth_variant, jobs):
+                print(f"Created: {filename}")
+    
+    with open(manifest_path, "w") as f:
+        json.dump(params, f, indent=2, sort_keys=True)
 
 if __name__ == "__main__":
     create_all_pumpkin_assets()
@@ -6,9 +6,10 @@ Main script to create the Halloween pumpkin projection video
 import cv2
 import numpy as np
 from PIL import Image, ImageDraw, ImageFont
-import os
 import random
 from moviepy.editor import *
+from asset_cache import asset_path, find_missing_assets
+from backgrounds import get_background_plate
 from dialogue_script import DIALOGUE_SCENES, SONGS, create_timeline
 
 class PumpkinVideoCreator:
@@ -23,15 +24,17 @@ class PumpkinVideoCreator:
         """Load all pumpkin face assets"""
         mouth_shapes = ["closed", "open_small", "open_medium", "open_wide", "singing"]
         
+        missing = find_missing_assets()
+        if missing:
+            raise FileNotFoundError("Missing pumpkin assets: " + ", ".join(missing))
+            
         for pumpkin_id in [1, 2]:
             self.pumpkin_assets[pumpkin_id] = {}
             for mouth_shape in mouth_shapes:
-                asset_path = f"assets/pumpkin_{pumpkin_id}_{mouth_shape}.png"
-                if os.path.exists(asset_path):
-                    img = Image.open(asset_path)
-                    # Resize to fit half the screen width
-                    img = img.resize((self.width//2 - 100, self.height - 200), Image.Resampling.LANCZOS)
-                    self.pumpkin_assets[pumpkin_id][mouth_shape] = img
+                img = Image.open(asset_path(pumpkin_id, mouth_shape))
+                # Resize to fit half the screen width
+                img = img.resize((self.width//2 - 100, self.height - 200), Image.Resampling.LANCZOS)
+                self.pumpkin_assets[pumpkin_id][mouth_shape] = img
                     
     def get_mouth_shape_for_phoneme(self, char):
         """Map characters to mouth shapes for basic lip sync"""
@@ -52,16 +55,9 @@ class PumpkinVideoCreator:
             
     def create_frame(self, pumpkin1_mouth, pumpkin2_mouth, background_effect="normal"):
         """Create a single frame with both pumpkins"""
-        # Create background
-        if background_effect == "spooky":
-            # Dark purple/black gradient
-            background = np.zeros((self.height, self.width, 3), dtype=np.uint8)
-            for y in range(self.height):
-                intensity = int(30 * (1 - y / self.height))
-                background[y, :] = [intensity, 0, intensity + 10]
-        else:
-            # Standard dark background
-            background = np.zeros((self.height, self.width, 3), dtype=np.uint8)
+        # Plates are stored BGR, flip them to RGB for PIL
+        plate = get_background_plate(background_effect, self.width, self.height)
+        background = np.ascontiguousarray(plate[:, :, ::-1])
             
         # Convert to PIL for easier compositing
         bg_img = Image.fromarray(background)
@@ -98,8 +94,7 @@ class PumpkinVideoCreator:
         return np.array(bg_img)
         
     def animate_dialogue_line(self, speaker, text, duration):
-        """Create animation frames for a dialogue line"""
-        frames = []
+        """Yield animation frames for a dialogue line"""
         total_frames = int(duration * self.fps)
         
         # Simple lip sync - alternate mouth shapes based on text
@@ -128,14 +123,10 @@ class PumpkinVideoCreator:
                 else:
                     pumpkin1_mouth = random.choice(["closed", "open_small"])
                     
-            frame = self.create_frame(pumpkin1_mouth, pumpkin2_mouth)
-            frames.append(frame)
-            
-        return frames
+            yield self.create_frame(pumpkin1_mouth, pumpkin2_mouth)
         
     def animate_song(self, song_data):
-        """Create animation frames for a song"""
-        frames = []
+        """Yield animation frames for a song"""
         total_frames = int(song_data["duration"] * self.fps)
         
         lyric_frames = []
@@ -187,47 +178,65 @@ class PumpkinVideoCreator:
                 
             # Add some rhythmic movement during songs
             background_effect = "spooky" if frame_num % 20 < 10 else "normal"
-            frame = self.create_frame(pumpkin1_mouth, pumpkin2_mouth, background_effect)
-            frames.append(frame)
-            
-        return frames
+            yield self.create_frame(pumpkin1_mouth, pumpkin2_mouth, background_effect)
         
-    def create_video(self, output_path="halloween_pumpkins.mp4"):
-        """Create the complete video"""
-        print("Creating Halloween pumpkin projection video...")
-        
-        timeline, total_duration = create_timeline()
-        all_frames = []
+    def count_frames(self, timeline):
+        """Number of frames the timeline renders to, without rendering them"""
+        frame_count = 0
+        for item in timeline:
+            if item['type'] == 'dialogue':
+                for line in item['content']['lines']:
+                    frame_count += int(line['duration'] * self.fps)
+            elif item['type'] == 'song':
+                frame_count += int(item['content']['duration'] * self.fps)
+        return frame_count
         
+    def iter_frames(self, timeline=None):
+        """Yield every frame of the show in order, one at a time"""
+        if timeline is None:
+            timeline, total_duration = create_timeline()
+            
         for item in timeline:
             print(f"Processing {item['type']}: {item['content'].get('scene', item['content'].get('title', 'Unknown'))}")
             
             if item['type'] == 'dialogue':
                 scene = item['content']
                 for line in scene['lines']:
-                    frames = self.animate_dialogue_line(
+                    yield from self.animate_dialogue_line(
                         line['speaker'], 
                         line['text'], 
                         line['duration']
                     )
-                    all_frames.extend(frames)
                     
             elif item['type'] == 'song':
-                song = item['content']
-                frames = self.animate_song(song)
-                all_frames.extend(frames)
+                yield from self.animate_song(item['content'])
                 
-        print(f"Generated {len(all_frames)} frames")
+    def create_video(self, output_path="halloween_pumpkins.mp4"):
+        """Create the complete video"""
+        print("Creating Halloween pumpkin projection video...")
+        
+        timeline, total_duration = create_timeline()
+        frame_count = self.count_frames(timeline)
+        
+        print(f"Streaming {frame_count} frames")
         print("Rendering video...")
         
-        # Create video using moviepy
+        # moviepy asks for frames in increasing time order while writing, so
+        # pull them from the generator on demand instead of holding the show in RAM
+        stream = {"frames": None, "index": -1, "frame": None}
+        
         def make_frame(t):
-            frame_idx = int(t * self.fps)
-            if frame_idx >= len(all_frames):
-                frame_idx = len(all_frames) - 1
-            return all_frames[frame_idx]
+            frame_idx = min(int(t * self.fps), frame_count - 1)
+            if stream["frames"] is None or frame_idx < stream["index"]:
+                # First call or a rewind - restart from the beginning
+                stream["frames"] = self.iter_frames(timeline)
+                stream["index"] = -1
+            while stream["index"] < frame_idx:
+                stream["frame"] = next(stream["frames"])
+                stream["index"] += 1
+            return stream["frame"]
             
-        video_duration = len(all_frames) / self.fps
+        video_duration = frame_count / self.fps
         clip = VideoClip(make_frame, duration=video_duration)
         
         # Write video file
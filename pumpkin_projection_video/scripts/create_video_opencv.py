@@ -3,73 +3,159 @@
 Create Halloween pumpkin projection video using OpenCV
 """
 
+import argparse
 import cv2
 import numpy as np
 from PIL import Image, ImageDraw, ImageFont
 import os
 import random
-from dialogue_script import DIALOGUE_SCENES, SONGS, create_timeline
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+from multiprocessing import Pool
+from asset_cache import MOUTH_SHAPES, asset_names, load_asset_atlas
+from audio_analysis import analyze_audio, fit_envelope
+from backgrounds import get_background_plate
+from batch_output import MultiResolutionWriter, resolve_profile
+from compositor import AlphaCompositor, PremultipliedSprite
+from dialogue_script import DIALOGUE_SCENES, SONGS
+from ffmpeg_utils import concat_videos
+from frame_pipeline import ThreadedFramePipeline
+from instrumentation import ChromeTraceWriter, Instrumentation, ProgressLogger
+from lipsync import EFFECTS, SONG_PATTERN, compile_line, mouth_for_char
+from particles import FireflySystem
+from render_cache import (DEFAULT_MAX_AGE_DAYS, DEFAULT_MAX_BYTES, RENDER_CACHE_DIR, SegmentRenderCache,
+                          content_digest, source_digest)
+from timeline import Timeline, load_show
+
+# Source files whose changes alter rendered pixels (dialogue_script.py is content, not code)
+RENDERER_SOURCES = ["create_video_opencv.py", "compositor.py", "backgrounds.py", "particles.py",
+                    "asset_cache.py", "create_pumpkin_assets.py", "timeline.py", "lipsync.py",
+                    "audio_analysis.py"]
+
+# Background effects that change every frame, so no two frames using them are identical
+ANIMATED_EFFECTS = {"spooky"}
+
+# Fixed default seed, so a rerun reproduces earlier renders (and reuses their
+# cache entries); pass seed=None for a different show every run
+DEFAULT_SEED = 1031
+
+# Frames per job in the process pool (10 seconds at 24 fps), so one long song
+# doesn't bound the speedup
+CHUNK_FRAMES = 240
 
 class PumpkinVideoCreator:
-    def __init__(self, width=1920, height=1080, fps=24):
+    def __init__(self, width=1920, height=1080, fps=24, frame_cache_size=64, seed=DEFAULT_SEED,
+                 firefly_count=12, asset_source="vector", observers=(), audio_path=None,
+                 frame_cache_max_bytes=512 * 2**20):
         self.width = width
         self.height = height
         self.fps = fps
-        self.pumpkin_assets = {}
+        # All randomness is derived from (seed, segment clock) so any frame renders
+        # the same no matter which process, order or timeline position produced it
+        self.seed = seed if seed is not None else random.randrange(2**32)
+        self.fireflies = FireflySystem(width, height, count=firefly_count, seed=self.seed, fps=fps)
+        
+        # Render callbacks (progress, tracing); see instrumentation.RenderObserver
+        self.instrumentation = Instrumentation(observers)
+        self.timeline = None  # Default show, loaded on first use
+        # Soundtrack whose loudness drives mouth openness and the song pulse (None: text only)
+        self.audio_path = audio_path
+        self.audio_envelope = None
+        
+        self.pumpkin_sprites = {}
+        self.mouth_diff_boxes = {}
+        self.asset_source = asset_source
+        self.asset_key = None
+        # Each render thread gets its own compositor scratch planes
+        self.thread_local = threading.local()
+        # Pumpkin 1 on the left, pumpkin 2 on the right
+        self.pumpkin_positions = {1: (50, 100), 2: (width//2 + 50, 100)}
         self.load_pumpkin_assets()
         
+        # Finished composites keyed by (pumpkin1_mouth, pumpkin2_mouth, background_effect).
+        # There are only 5x5 mouth combinations times two backgrounds, so almost
+        # every frame after warm-up is a copy instead of a full alpha blend.
+        # The entry limit is also capped in bytes: a 4K composite is about 25 MB.
+        self.frame_cache = OrderedDict()
+        self.frame_cache_size = min(frame_cache_size, frame_cache_max_bytes // (width * height * 3))
+        self.frame_cache_hits = 0
+        self.frame_cache_misses = 0
+        self.frame_cache_lock = threading.Lock()  # Render threads share the cache
+        
     def load_pumpkin_assets(self):
-        """Load all pumpkin face assets"""
-        mouth_shapes = ["closed", "open_small", "open_medium", "open_wide", "singing"]
+        """Load all pumpkin face assets as premultiplied sprites"""
+        # Fit half the screen width
+        target_width = self.width//2 - 100
+        target_height = self.height - 200
+        
+        # Drawn at exactly the on-screen size (or decoded and resized from the PNGs)
+        # and premultiplied once, then memory-mapped from disk on later start-ups
+        atlas, self.asset_key = load_asset_atlas(target_width, target_height, self.asset_source)
         
         for pumpkin_id in [1, 2]:
-            self.pumpkin_assets[pumpkin_id] = {}
-            for mouth_shape in mouth_shapes:
-                asset_path = f"assets/pumpkin_{pumpkin_id}_{mouth_shape}.png"
-                if os.path.exists(asset_path):
-                    img = cv2.imread(asset_path, cv2.IMREAD_UNCHANGED)
-                    if img is not None:
-                        # Resize to fit half the screen width
-                        target_width = self.width//2 - 100
-                        target_height = self.height - 200
-                        img = cv2.resize(img, (target_width, target_height))
-                        self.pumpkin_assets[pumpkin_id][mouth_shape] = img
+            self.pumpkin_sprites[pumpkin_id] = {}
+        for index, (pumpkin_id, mouth_shape) in enumerate(asset_names()):
+            self.pumpkin_sprites[pumpkin_id][mouth_shape] = PremultipliedSprite(
+                atlas[index, :, :, :3], atlas[index, :, :, 3:4])
+        
+        for pumpkin_id, sprites in self.pumpkin_sprites.items():
+            self.mouth_diff_boxes[pumpkin_id] = self.find_mouth_diff_boxes(sprites)
+            
+    def find_mouth_diff_boxes(self, sprites):
+        """{(mouth_a, mouth_b): (top, bottom, left, right)} boxes of the pixels that differ
+        
+        Boxes are in sprite pixels, or None when the two assets are identical.
+        Diff masks are only taken inside the area where any mouth differs from
+        the closed one, which keeps this cheap at start-up.
+        """
+        def layers(sprite, crop=(slice(None), slice(None))):
+            return np.concatenate([np.asarray(sprite.premul[crop]), np.asarray(sprite.inv_alpha[crop])], axis=2)
+            
+        def bounding_box(mask):
+            ys, xs = np.nonzero(mask)
+            if len(ys) == 0:
+                return None
+            return int(ys.min()), int(ys.max()) + 1, int(xs.min()), int(xs.max()) + 1
+            
+        closed = layers(sprites["closed"])
+        changed = np.zeros(closed.shape[:2], dtype=bool)
+        for sprite in sprites.values():
+            changed |= (layers(sprite) != closed).any(axis=2)
+        area = bounding_box(changed)
+            
+        boxes = {}
+        cropped = {}
+        if area is not None:
+            top, bottom, left, right = area
+            cropped = {mouth_shape: layers(sprite, (slice(top, bottom), slice(left, right)))
+                       for mouth_shape, sprite in sprites.items()}
+        for mouth_a in sprites:
+            for mouth_b in sprites:
+                box = None
+                if area is not None and mouth_a != mouth_b:
+                    box = bounding_box((cropped[mouth_a] != cropped[mouth_b]).any(axis=2))
+                if box is not None:
+                    box = (box[0] + top, box[1] + top, box[2] + left, box[3] + left)
+                boxes[mouth_a, mouth_b] = box
+        return boxes
+        
+    def get_compositor(self):
+        """Compositor private to the calling thread"""
+        compositor = getattr(self.thread_local, "compositor", None)
+        if compositor is None:
+            compositor = self.thread_local.compositor = AlphaCompositor(self.height - 200, self.width//2 - 100)
+        return compositor
                     
     def get_mouth_shape_for_phoneme(self, char):
         """Map characters to mouth shapes for basic lip sync"""
-        vowels = "aeiouAEIOU"
-        consonants_open = "bpmBPM"
-        consonants_wide = "fvFV"
-        
-        if char in vowels:
-            return "open_medium"
-        elif char in consonants_open:
-            return "closed"
-        elif char in consonants_wide:
-            return "open_wide"
-        elif char.isalpha():
-            return "open_small"
-        else:
-            return "closed"
+        return mouth_for_char(char)
             
     def overlay_image_alpha(self, img, img_overlay, x, y):
         """Overlay an image with alpha channel"""
         if img_overlay.shape[2] == 4:  # Has alpha channel
-            alpha_s = img_overlay[:, :, 3] / 255.0
-            alpha_l = 1.0 - alpha_s
-            
-            y1, y2 = max(0, y), min(img.shape[0], y + img_overlay.shape[0])
-            x1, x2 = max(0, x), min(img.shape[1], x + img_overlay.shape[1])
-            
-            y1_o, y2_o = max(0, -y), min(img_overlay.shape[0], img.shape[0] - y)
-            x1_o, x2_o = max(0, -x), min(img_overlay.shape[1], img.shape[1] - x)
-            
-            if y1 >= y2 or x1 >= x2:
-                return img
-                
-            for c in range(0, 3):
-                img[y1:y2, x1:x2, c] = (alpha_s[y1_o:y2_o, x1_o:x2_o] * img_overlay[y1_o:y2_o, x1_o:x2_o, c] +
-                                       alpha_l[y1_o:y2_o, x1_o:x2_o] * img[y1:y2, x1:x2, c])
+            self.get_compositor().blend(img, PremultipliedSprite.from_rgba(img_overlay), x, y)
         else:
             # No alpha channel, simple overlay
             y1, y2 = max(0, y), min(img.shape[0], y + img_overlay.shape[0])
@@ -83,148 +169,463 @@ class PumpkinVideoCreator:
                 
         return img
             
-    def create_frame(self, pumpkin1_mouth, pumpkin2_mouth, background_effect="normal"):
-        """Create a single frame with both pumpkins"""
-        # Create background
-        if background_effect == "spooky":
-            # Dark purple/black gradient
-            background = np.zeros((self.height, self.width, 3), dtype=np.uint8)
-            for y in range(self.height):
-                intensity = int(30 * (1 - y / self.height))
-                background[y, :] = [intensity + 10, 0, intensity]  # BGR format
-        else:
-            # Standard dark background
-            background = np.zeros((self.height, self.width, 3), dtype=np.uint8)
+    def draw_pumpkin(self, frame, pumpkin_id, mouth_shape, x, y):
+        """Blend one pumpkin asset into frame, falling back to the closed mouth"""
+        sprites = self.pumpkin_sprites[pumpkin_id]
+        self.get_compositor().blend(frame, sprites.get(mouth_shape, sprites["closed"]), x, y)
+            
+    def compose_frame(self, pumpkin1_mouth, pumpkin2_mouth, background_effect="normal"):
+        """Composite the background and both pumpkins (no per-frame effects)"""
+        # Start from a copy of the precomputed plate for this effect
+        background = get_background_plate(background_effect, self.width, self.height).copy()
+        
+        # Position pumpkin 1 on the left, pumpkin 2 on the right
+        for pumpkin_id, mouth_shape in [(1, pumpkin1_mouth), (2, pumpkin2_mouth)]:
+            self.draw_pumpkin(background, pumpkin_id, mouth_shape, *self.pumpkin_positions[pumpkin_id])
             
-        # Get pumpkin images
-        pumpkin1_img = self.pumpkin_assets[1].get(pumpkin1_mouth, 
-                                                 self.pumpkin_assets[1].get("closed"))
-        pumpkin2_img = self.pumpkin_assets[2].get(pumpkin2_mouth, 
-                                                 self.pumpkin_assets[2].get("closed"))
+        return background
         
-        if pumpkin1_img is not None:
-            # Position pumpkin 1 on the left
-            self.overlay_image_alpha(background, pumpkin1_img, 50, 100)
+    def get_cached_composite(self, pumpkin1_mouth, pumpkin2_mouth, background_effect="normal"):
+        """Return a shared composite from the LRU frame cache (do not modify it)
+        
+        The lock only guards the cache: a miss is composited outside it, so the
+        other render threads keep going. Two threads missing the same key may
+        both composite it; the first one stored is kept.
+        """
+        key = (pumpkin1_mouth, pumpkin2_mouth, background_effect)
+        with self.frame_cache_lock:
+            composite = self.frame_cache.get(key)
+            if composite is not None:
+                self.frame_cache.move_to_end(key)
+                self.frame_cache_hits += 1
+                self.instrumentation.cache_hit(key)
+                return composite
+            self.frame_cache_misses += 1
+            self.instrumentation.cache_miss(key)
             
-        if pumpkin2_img is not None:
-            # Position pumpkin 2 on the right
-            self.overlay_image_alpha(background, pumpkin2_img, self.width//2 + 50, 100)
+        with self.instrumentation.stage("composite"):
+            composite = self.compose_frame(pumpkin1_mouth, pumpkin2_mouth, background_effect)
+        
+        with self.frame_cache_lock:
+            if key in self.frame_cache:
+                return self.frame_cache[key]  # Another thread finished it first
+            if self.frame_cache_size > 0:
+                self.frame_cache[key] = composite
+                if len(self.frame_cache) > self.frame_cache_size:
+                    self.frame_cache.popitem(last=False)  # Evict least recently used
+                
+        return composite
+        
+    def frame_rng(self, frame_index, stream="idle"):
+        """Deterministic random generator for one frame of the show"""
+        return random.Random(f"{self.seed}:{stream}:{frame_index}")
+        
+    def create_frame(self, pumpkin1_mouth, pumpkin2_mouth, background_effect="normal", frame_index=None,
+                     out=None):
+        """Create a single frame with both pumpkins (into out, a reusable buffer, if given)"""
+        # Copy the cached composite so per-frame effects never touch the cache
+        composite = self.get_cached_composite(pumpkin1_mouth, pumpkin2_mouth, background_effect)
+        if out is None:
+            background = composite.copy()
+        else:
+            background = out
+            np.copyto(background, composite)
             
         # Add some atmospheric effects
         if background_effect == "spooky":
-            # Add some random "firefly" effects
-            for _ in range(random.randint(5, 15)):
-                x = random.randint(0, self.width-10)
-                y = random.randint(0, self.height-10)
-                size = random.randint(2, 6)
-                color = (random.randint(100, 255), 255, 255)  # BGR format
-                cv2.circle(background, (x, y), size, color, -1)
+            # Fireflies drift continuously; their state depends only on the frame index
+            with self.instrumentation.stage("fireflies"):
+                self.fireflies.render(background, frame_index)
         
         return background
         
-    def animate_dialogue_line(self, speaker, text, duration):
-        """Create animation frames for a dialogue line"""
-        frames = []
-        total_frames = int(duration * self.fps)
+    def frame_key(self, state):
+        """What a frame's pixels depend on, or None if they change every frame"""
+        pumpkin1_mouth, pumpkin2_mouth, background_effect, frame_index = state
+        if background_effect in ANIMATED_EFFECTS:
+            return None
+        return pumpkin1_mouth, pumpkin2_mouth, background_effect
+        
+    def update_frame(self, buffer, state, previous_state=None):
+        """Turn buffer, currently holding previous_state's frame, into the frame for state
         
-        # Simple lip sync - alternate mouth shapes based on text
-        for frame_num in range(total_frames):
-            progress = frame_num / total_frames if total_frames > 0 else 0
-            char_index = int(progress * len(text)) if text else 0
+        When only mouths changed on a static background, just the rectangle
+        where the old and new mouth assets differ is restored from the
+        background plate and re-blended; the rest of the frame is left alone.
+        """
+        if previous_state is None or self.frame_key(previous_state) is None or previous_state[2] != state[2]:
+            return self.create_frame(*state, out=buffer)
             
-            if char_index < len(text):
-                current_char = text[char_index]
-                mouth_shape = self.get_mouth_shape_for_phoneme(current_char)
-            else:
-                mouth_shape = "closed"
+        plate = get_background_plate(state[2], self.width, self.height)
+        for pumpkin_id in [1, 2]:
+            sprites = self.pumpkin_sprites[pumpkin_id]
+            old_mouth, new_mouth = [mouth if mouth in sprites else "closed"
+                                    for mouth in (previous_state[pumpkin_id - 1], state[pumpkin_id - 1])]
+            box = self.mouth_diff_boxes[pumpkin_id][old_mouth, new_mouth]
+            if box is None:
+                continue
+                
+            x, y = self.pumpkin_positions[pumpkin_id]
+            top, bottom, left, right = box
+            y1, y2 = max(0, y + top), min(self.height, y + bottom)
+            x1, x2 = max(0, x + left), min(self.width, x + right)
+            buffer[y1:y2, x1:x2] = plate[y1:y2, x1:x2]
+            self.get_compositor().blend(buffer, sprites[new_mouth], x, y, rect=box)
+        return buffer
+        
+    def track_state(self, row, frame_num, clock=0, speaker=None):
+        """(pumpkin1_mouth, pumpkin2_mouth, background_effect, frame_index) from one row of a
+        compiled lip-sync track (see lipsync.py)
+        
+        Depends only on its arguments and the seed, so any frame can be computed on its own.
+        """
+        mouth1, mouth2, effect = row
+        pumpkin1_mouth = MOUTH_SHAPES[mouth1]
+        pumpkin2_mouth = MOUTH_SHAPES[mouth2]
                 
-            # Determine which pumpkin is speaking
+        # Add some random blinking/idle animation for non-speaking pumpkin
+        if speaker is not None and frame_num % 60 == 0:  # Every 2.5 seconds at 24fps
+            idle_mouth = self.frame_rng(clock + frame_num, "idle").choice(["closed", "open_small"])
             if speaker == 1:
-                pumpkin1_mouth = mouth_shape
-                pumpkin2_mouth = "closed"
+                pumpkin2_mouth = idle_mouth
             else:
-                pumpkin1_mouth = "closed"
-                pumpkin2_mouth = mouth_shape
-                
-            # Add some random blinking/idle animation for non-speaking pumpkin
-            if frame_num % 60 == 0:  # Every 2.5 seconds at 24fps
-                if speaker == 1:
-                    pumpkin2_mouth = random.choice(["closed", "open_small"])
-                else:
-                    pumpkin1_mouth = random.choice(["closed", "open_small"])
+                pumpkin1_mouth = idle_mouth
                     
-            frame = self.create_frame(pumpkin1_mouth, pumpkin2_mouth)
-            frames.append(frame)
-            
-        return frames
-        
-    def animate_song(self, song_data):
-        """Create animation frames for a song"""
-        frames = []
-        total_frames = int(song_data["duration"] * self.fps)
-        
-        for frame_num in range(total_frames):
-            # Determine singing pattern
-            # Both pumpkins singing with alternating emphasis
-            cycle_length = 60  # 2.5 seconds at 24fps
-            cycle_pos = frame_num % cycle_length
-            
-            if cycle_pos < 15:
-                pumpkin1_mouth = "singing"
-                pumpkin2_mouth = "open_medium"
-            elif cycle_pos < 30:
-                pumpkin1_mouth = "open_medium"
-                pumpkin2_mouth = "singing"
-            elif cycle_pos < 45:
-                pumpkin1_mouth = "singing"
-                pumpkin2_mouth = "singing"
-            else:
-                pumpkin1_mouth = "open_small"
-                pumpkin2_mouth = "open_small"
-                
-            # Add some rhythmic background effects during songs
-            background_effect = "spooky" if (frame_num // 12) % 2 == 0 else "normal"
-            frame = self.create_frame(pumpkin1_mouth, pumpkin2_mouth, background_effect)
-            frames.append(frame)
+        return pumpkin1_mouth, pumpkin2_mouth, EFFECTS[effect], clock + frame_num
+        
+    def dialogue_line_states(self, speaker, text, duration, clock=0):
+        """Yield (pumpkin1_mouth, pumpkin2_mouth, background_effect, frame_index) per frame of a line"""
+        # Rows as plain tuples are cheaper to unpack than NumPy scalars
+        track = compile_line(speaker, text, int(duration * self.fps)).tolist()
+        for frame_num, row in enumerate(track):
+            yield self.track_state(row, frame_num, clock, speaker=speaker)
+        
+    def animate_dialogue_line(self, speaker, text, duration, clock=0):
+        """Yield animation frames for a dialogue line (clock seeds per-frame randomness)"""
+        for state in self.dialogue_line_states(speaker, text, duration, clock):
+            yield self.create_frame(*state)
+            
+    def song_states(self, song_data, clock=0):
+        """Yield (pumpkin1_mouth, pumpkin2_mouth, background_effect, frame_index) per frame of a song"""
+        pattern = SONG_PATTERN.tolist()
+        for frame_num in range(int(song_data["duration"] * self.fps)):
+            yield self.track_state(pattern[frame_num % len(pattern)], frame_num, clock)
             
-        return frames
+    def animate_song(self, song_data, clock=0):
+        """Yield animation frames for a song (clock seeds per-frame randomness)"""
+        for state in self.song_states(song_data, clock):
+            yield self.create_frame(*state)
+        
+    def get_timeline(self, timeline=None):
+        """A Timeline at this creator's frame rate: the default show, or a list of timeline items
+        
+        A Timeline passed in is rebuilt as a copy whenever it has to change (another
+        frame rate, or a soundtrack to drive it from), so the caller's is never
+        modified and always gets the same treatment as a plain list of items.
+        """
+        if timeline is None or timeline is self.timeline:
+            # Loaded once, so random access into the default show stays cheap
+            if self.timeline is None:
+                self.timeline = self.drive_from_audio(load_show(fps=self.fps))
+            return self.timeline
+        if isinstance(timeline, Timeline):
+            if timeline.fps == self.fps and self.audio_path is None:
+                return timeline
+            return self.drive_from_audio(Timeline(timeline.items, self.fps, timeline.title))
+        return self.drive_from_audio(Timeline(timeline, self.fps))
+        
+    def drive_from_audio(self, timeline):
+        """Apply the soundtrack's loudness envelope to a freshly built timeline (if there is a soundtrack)
+        
+        apply_envelope() changes the timeline's segments in place, so it must be
+        one built here rather than one handed in by a caller.
+        """
+        if self.audio_path is None:
+            return timeline
+        if self.audio_envelope is None:
+            # Analysed once per creator; the whole 8.5-minute track takes well under a second
+            self.audio_envelope = analyze_audio(self.audio_path, self.fps)
+        return timeline.apply_envelope(fit_envelope(self.audio_envelope, timeline.total_frames))
+        
+    def iter_segments(self, timeline=None):
+        """Split the timeline into independent segments (one per dialogue line or song)"""
+        return self.get_timeline(timeline).segments
+        
+    def segment_state(self, segment, frame_num):
+        """State of frame frame_num within a segment, read from its compiled track"""
+        speaker = segment['content']['speaker'] if segment['type'] == 'dialogue' else None
+        return self.track_state(segment['track'][frame_num], frame_num, segment['clock'], speaker=speaker)
         
-    def create_video(self, output_path="halloween_pumpkins.mp4"):
-        """Create the complete video"""
+    def segment_states(self, segment, start=0, end=None):
+        """Yield the per-frame states of a single segment (frames start to end)"""
+        speaker = segment['content']['speaker'] if segment['type'] == 'dialogue' else None
+        for frame_num, row in enumerate(segment['track'][start:end].tolist(), start):
+            yield self.track_state(row, frame_num, segment['clock'], speaker=speaker)
+            
+    def frame_state(self, frame_index, timeline=None):
+        """State of any frame of the show, found by timeline lookup rather than by playing up to it"""
+        segment, frame_num = self.get_timeline(timeline).segment_at(frame_index)
+        return self.segment_state(segment, frame_num)
+        
+    def render_frame(self, frame_index, timeline=None):
+        """Render frame frame_index of the show on its own, without rendering any frame before it"""
+        return self.create_frame(*self.frame_state(frame_index, timeline))
+            
+    def render_segment(self, segment, start=0, end=None):
+        """Yield the frames of a single segment (frames start to end)"""
+        for state in self.segment_states(segment, start, end):
+            yield self.create_frame(*state)
+            
+    def iter_frame_states(self, timeline=None):
+        """Yield the state of every frame of the show in order"""
+        current_item = None
+        for segment in self.iter_segments(timeline):
+            if segment['item_index'] != current_item:
+                current_item = segment['item_index']
+                print(f"Processing {segment['type']}: {segment['label']}")
+            yield from self.segment_states(segment)
+            
+    def iter_frames(self, timeline=None):
+        """Yield every frame of the show in order, one at a time"""
+        for state in self.iter_frame_states(timeline):
+            yield self.create_frame(*state)
+            
+    def write_segment(self, segment, output_path, start=0, end=None):
+        """Render one segment (or its frames start to end) to its own video file"""
+        fourcc = cv2.VideoWriter_fourcc(*'mp4v')
+        out = cv2.VideoWriter(output_path, fourcc, self.fps, (self.width, self.height))
+        frame_count = 0
+        for frame in self.render_segment(segment, start, end):
+            out.write(frame)
+            frame_count += 1
+        out.release()
+        return frame_count
+        
+    def create_video(self, output_path="halloween_pumpkins.mp4", workers=1, progress=True,
+                     trace_path=None, render_threads=2):
+        """Create the complete video
+        
+        progress logs rolling fps and ETA; trace_path writes a Chrome trace of
+        where each frame's time went. render_threads > 0 composites in that many
+        threads while another feeds the encoder; 0 renders and encodes in turn.
+        """
+        if workers > 1:
+            return self.create_video_parallel(output_path, workers)
+            
         print("Creating Halloween pumpkin projection video...")
         
-        timeline, total_duration = create_timeline()
+        timeline = self.get_timeline()
         
         # Initialize video writer
         fourcc = cv2.VideoWriter_fourcc(*'mp4v')
         out = cv2.VideoWriter(output_path, fourcc, self.fps, (self.width, self.height))
         
+        try:
+            frame_count, duplicates = self.write_show(out, timeline, render_threads, progress, trace_path)
+        finally:
+            out.release()
+        
+        video_duration = frame_count / self.fps
+        print(f"Video saved as {output_path}")
+        print(f"Generated {frame_count} frames")
+        print(f"Duration: {video_duration:.1f} seconds ({video_duration/60:.1f} minutes)")
+        print(f"Frame cache: {self.frame_cache_hits} hits, {self.frame_cache_misses} misses")
+        print(f"Repeated frames written without recompositing: {duplicates}")
+        
+        return output_path
+        
+    def create_video_batch(self, outputs, render_threads=2, progress=True, trace_path=None, audio_path=None):
+        """Composite the show once and encode it to several outputs at the same time
+        
+        outputs maps each output path to a profile: a name from
+        batch_output.OUTPUT_PROFILES or a dict like its entries (width, height,
+        codec, bitrate, preset). Frames are rendered at this creator's size, the
+        largest output, and every output downscales (INTER_AREA) and encodes in
+        its own thread. audio_path is muxed into every output.
+        """
+        profiles = [resolve_profile(profile) for profile in outputs.values()]
+        for path, profile in zip(outputs, profiles):
+            if profile['width'] > self.width or profile['height'] > self.height:
+                raise ValueError(f"{path} is {profile['width']}x{profile['height']}, larger than the "
+                                 f"{self.width}x{self.height} render")
+            if abs(profile['width'] * self.height - profile['height'] * self.width) > self.width:
+                raise ValueError(f"{path} is {profile['width']}x{profile['height']}, a different aspect "
+                                 f"ratio from the {self.width}x{self.height} render")
+                
+        print(f"Creating Halloween pumpkin projection video in {len(outputs)} versions...")
+        
+        out = MultiResolutionWriter(outputs, self.fps, audio_path)
+        try:
+            frame_count, duplicates = self.write_show(out, self.get_timeline(), render_threads,
+                                                      progress, trace_path)
+        finally:
+            out.release()
+            
+        for path, profile in zip(outputs, profiles):
+            codec = profile.get('codec', "libx264")
+            print(f"Video saved as {path} ({profile['width']}x{profile['height']}, {codec})")
+        print(f"Generated {frame_count} frames, composited once at {self.width}x{self.height}")
+        print(f"Repeated frames written without recompositing: {duplicates}")
+        
+        return list(outputs)
+        
+    def write_show(self, out, timeline, render_threads=2, progress=False, trace_path=None):
+        """Render every frame of timeline into out (anything with write(frame)); returns
+        (frames written, repeated frames that were not recomposited)
+        
+        progress logs rolling fps and ETA; trace_path writes a Chrome trace of
+        where each frame's time went.
+        """
+        observers = []
+        if progress:
+            observers.append(ProgressLogger())
+        if trace_path:
+            observers.append(ChromeTraceWriter(trace_path))
+        for observer in observers:
+            self.instrumentation.add(observer)
+        try:
+            return self.render_show(out, timeline, render_threads)
+        finally:
+            for observer in observers:
+                self.instrumentation.remove(observer)
+        
+    def render_show(self, out, timeline, render_threads):
         frame_count = 0
+        self.instrumentation.render_start(timeline.total_frames)
+        if render_threads > 0:
+            pipeline = ThreadedFramePipeline(
+                self.update_frame, out.write, (self.height, self.width, 3),
+                workers=render_threads, instrumentation=self.instrumentation,
+                frame_key=self.frame_key)
+            frame_count = pipeline.run(self.iter_frame_states(timeline))
+            duplicates = pipeline.duplicates
+        else:
+            # One persistent buffer: repeated states are written again as they
+            # are, and mouth changes only touch the mouth regions
+            buffer = np.empty((self.height, self.width, 3), dtype=np.uint8)
+            buffer_state = None
+            duplicates = 0
+            for state in self.instrumentation.timed_frames(self.iter_frame_states(timeline)):
+                key = self.frame_key(state)
+                if buffer_state is not None and key is not None and key == self.frame_key(buffer_state):
+                    duplicates += 1
+                else:
+                    self.update_frame(buffer, state, buffer_state)
+                    buffer_state = state
+                with self.instrumentation.stage("encode"):
+                    out.write(buffer)
+                frame_count += 1
+        self.instrumentation.render_end(frame_count)
+        return frame_count, duplicates
         
-        for item in timeline:
-            print(f"Processing {item['type']}: {item['content'].get('scene', item['content'].get('title', 'Unknown'))}")
-            
-            if item['type'] == 'dialogue':
-                scene = item['content']
-                for line in scene['lines']:
-                    frames = self.animate_dialogue_line(
-                        line['speaker'], 
-                        line['text'], 
-                        line['duration']
-                    )
-                    for frame in frames:
-                        out.write(frame)
-                        frame_count += 1
-                    
-            elif item['type'] == 'song':
-                song = item['content']
-                frames = self.animate_song(song)
-                for frame in frames:
-                    out.write(frame)
-                    frame_count += 1
+    def render_segments_parallel(self, jobs, workers, total_segments):
+        """Render (segment, path) jobs in a process pool, returning the frame count
+        
+        Every frame depends only on its segment, frame number and the seed, so
+        segments are split into chunks of CHUNK_FRAMES that render as separate
+        jobs and are stream-copied back together into each segment's path.
+        """
+        chunk_dir = tempfile.mkdtemp(prefix="pumpkin_chunks_",
+                                     dir=os.path.dirname(os.path.abspath(jobs[0][1])))
+        chunk_jobs = []
+        chunk_paths = {}
+        for segment, path in jobs:
+            chunk_paths[path] = []
+            for start in range(0, segment['frame_count'], CHUNK_FRAMES):
+                chunk_path = os.path.join(chunk_dir, f"segment_{segment['index']:04d}_{start:06d}.mp4")
+                end = min(start + CHUNK_FRAMES, segment['frame_count'])
+                chunk_paths[path].append(chunk_path)
+                chunk_jobs.append((segment, chunk_path, start, end))
                 
-        out.release()
+        frame_count = 0
+        try:
+            with Pool(workers, initializer=_init_segment_worker,
+                      initargs=(self.width, self.height, self.fps, self.seed,
+                                self.fireflies.count, self.asset_source)) as pool:
+                for index, label, start, end in pool.imap_unordered(_render_segment_job, chunk_jobs):
+                    frame_count += end - start
+                    print(f"Rendered segment {index + 1}/{total_segments}: {label} (frames {start}-{end - 1})")
+            for path, paths in chunk_paths.items():
+                concat_videos(paths, path)
+        finally:
+            shutil.rmtree(chunk_dir, ignore_errors=True)
+        return frame_count
+        
+    def render_settings(self):
+        """Everything besides segment content that affects rendered pixels"""
+        return {
+            "width": self.width,
+            "height": self.height,
+            "fps": self.fps,
+            "seed": self.seed,
+            "fireflies": self.fireflies.count,
+            "codec": "mp4v",
+            "assets": self.asset_key,
+            "source": source_digest(RENDERER_SOURCES)
+        }
+        
+    def create_video_cached(self, output_path="halloween_pumpkins.mp4", cache_dir=RENDER_CACHE_DIR,
+                            workers=1, max_bytes=DEFAULT_MAX_BYTES, max_age_days=DEFAULT_MAX_AGE_DAYS):
+        """Rebuild only the segments whose content, settings or assets changed"""
+        print("Creating Halloween pumpkin projection video (incremental)...")
+        
+        cache = SegmentRenderCache(cache_dir, max_bytes=max_bytes, max_age_days=max_age_days)
+        settings_key = content_digest(self.render_settings())
+        segments = self.iter_segments()
+        
+        segment_paths = []
+        jobs = []
+        pending = []
+        for segment in segments:
+            key = content_digest([settings_key, segment['key']])
+            label = f"{segment['label']} #{segment['index']}"
+            cached_path = cache.lookup(key)
+            if cached_path is not None:
+                cache.record(label, reused=True)
+                segment_paths.append(cached_path)
+            else:
+                cache.record(label, reused=False)
+                segment_paths.append(cache.path_for(key))
+                temp_path = cache.temp_path_for(key)
+                jobs.append((segment, temp_path))
+                pending.append((temp_path, key))
+                
+        # Identical segments share one entry, render each only once
+        unique_jobs = list({temp_path: (segment, temp_path) for segment, temp_path in jobs}.values())
+        if workers > 1 and unique_jobs:
+            self.render_segments_parallel(unique_jobs, workers, len(segments))
+        else:
+            for segment, temp_path in unique_jobs:
+                print(f"Rendering segment {segment['index'] + 1}/{len(segments)}: {segment['label']}")
+                self.write_segment(segment, temp_path)
+        for temp_path, key in dict(pending).items():
+            cache.store(temp_path, key)
+            
+        concat_videos(segment_paths, output_path)
+        cache.evict()
+        cache.print_report()
+        
+        print(f"Video saved as {output_path}")
+        return output_path
+        
+    def create_video_parallel(self, output_path="halloween_pumpkins.mp4", workers=None):
+        """Render timeline segments in a process pool and stream-copy them together"""
+        workers = workers or os.cpu_count() or 1
+        print(f"Creating Halloween pumpkin projection video with {workers} workers...")
         
+        segments = self.iter_segments()
+        segment_dir = tempfile.mkdtemp(prefix="pumpkin_segments_",
+                                       dir=os.path.dirname(os.path.abspath(output_path)))
+        segment_paths = [os.path.join(segment_dir, f"segment_{segment['index']:04d}.mp4")
+                         for segment in segments]
+        
+        try:
+            frame_count = self.render_segments_parallel(list(zip(segments, segment_paths)), workers,
+                                                        len(segments))
+            concat_videos(segment_paths, output_path)
+        finally:
+            shutil.rmtree(segment_dir, ignore_errors=True)
+            
         video_duration = frame_count / self.fps
         print(f"Video saved as {output_path}")
         print(f"Generated {frame_count} frames")
@@ -232,9 +633,35 @@ class PumpkinVideoCreator:
         
         return output_path
 
+# Per-process creator used by the parallel segment renderer
+_segment_creator = None
+
+def _init_segment_worker(width, height, fps, seed, firefly_count, asset_source):
+    global _segment_creator
+    _segment_creator = PumpkinVideoCreator(width=width, height=height, fps=fps, seed=seed,
+                                           firefly_count=firefly_count, asset_source=asset_source)
+
+def _render_segment_job(job):
+    segment, path, start, end = job
+    _segment_creator.write_segment(segment, path, start, end)
+    return segment['index'], segment['label'], start, end
+
 def main():
-    creator = PumpkinVideoCreator(width=1920, height=1080, fps=24)
-    output_file = creator.create_video("Halloween_Pumpkin_Projection_Video.mp4")
+    parser = argparse.ArgumentParser(description="Create the Halloween pumpkin projection video")
+    parser.add_argument("--output", default="Halloween_Pumpkin_Projection_Video.mp4")
+    parser.add_argument("--incremental", action="store_true",
+                        help="re-render only segments whose content or settings changed (cached in .render_cache)")
+    parser.add_argument("--workers", type=int, default=1, help="render processes")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--audio", default=None,
+                        help="WAV whose loudness drives the lip sync (e.g. audio/halloween_background.wav)")
+    args = parser.parse_args()
+    
+    creator = PumpkinVideoCreator(width=1920, height=1080, fps=24, seed=args.seed, audio_path=args.audio)
+    if args.incremental:
+        output_file = creator.create_video_cached(args.output, workers=args.workers)
+    else:
+        output_file = creator.create_video(args.output, workers=args.workers)
     
     print("\n" + "="*50)
     print("🎃 HALLOWEEN PUMPKIN PROJECTION VIDEO COMPLETE! 🎃")
@@ -7,7 +7,7 @@ Halloween dialogue and song script for talking pumpkins
 DIALOGUE_SCENES = [
     {
         "scene": "introduction",
-        "duration": 45,
+        "duration": 25,
         "lines": [
             {"speaker": 1, "text": "Well hello there, Jack! Ready for another spooky Halloween night?", "duration": 4},
             {"speaker": 2, "text": "Oh my gourd, yes! I've been waiting all year for this moment!", "duration": 4},
@@ -19,7 +19,7 @@ DIALOGUE_SCENES = [
     },
     {
         "scene": "song1_intro",
-        "duration": 15,
+        "duration": 8,
         "lines": [
             {"speaker": 1, "text": "How about we sing about our favorite Halloween creatures?", "duration": 4},
             {"speaker": 2, "text": "Perfect! I know just the song. Ready? One, two, three...", "duration": 4}
@@ -27,7 +27,7 @@ DIALOGUE_SCENES = [
     },
     {
         "scene": "intermission1",
-        "duration": 30,
+        "duration": 18,
         "lines": [
             {"speaker": 2, "text": "That was wonderfully wicked! Did you hear that owl hooting?", "duration": 4},
             {"speaker": 1, "text": "I did! Even the bats are dancing to our tune tonight!", "duration": 4},
@@ -38,7 +38,7 @@ DIALOGUE_SCENES = [
     },
     {
         "scene": "song2_intro", 
-        "duration": 10,
+        "duration": 5,
         "lines": [
             {"speaker": 1, "text": "This one's about our haunted house! Ready?", "duration": 3},
             {"speaker": 2, "text": "Let's make it extra eerie!", "duration": 2}
@@ -46,7 +46,7 @@ DIALOGUE_SCENES = [
     },
     {
         "scene": "intermission2",
-        "duration": 35,
+        "duration": 25,
         "lines": [
             {"speaker": 1, "text": "I love how our voices echo through the night!", "duration": 4},
             {"speaker": 2, "text": "Me too! I think we're attracting quite an audience of spirits.", "duration": 4},
@@ -58,7 +58,7 @@ DIALOGUE_SCENES = [
     },
     {
         "scene": "song3_intro",
-        "duration": 8,
+        "duration": 5,
         "lines": [
             {"speaker": 1, "text": "This one's for all the creatures of the night...", "duration": 3},
             {"speaker": 2, "text": "A Halloween lullaby it is!", "duration": 2}
@@ -66,7 +66,7 @@ DIALOGUE_SCENES = [
     },
     {
         "scene": "finale",
-        "duration": 40,
+        "duration": 31,
         "lines": [
             {"speaker": 2, "text": "What a magical Halloween evening this has been!", "duration": 4},
             {"speaker": 1, "text": "Indeed! Our songs have filled the night with spooky joy.", "duration": 4},
@@ -148,55 +148,20 @@ SONGS = [
 
 def get_total_video_duration():
     """Calculate total duration of all scenes and songs"""
-    total = 0
-    
-    # Add dialogue scenes
-    for scene in DIALOGUE_SCENES:
-        total += scene["duration"]
-    
-    # Add songs
-    for song in SONGS:
-        total += song["duration"]
-    
-    return total
+    # Summed from the lines and songs themselves; the scene "duration" fields
+    # are only informational (python timeline.py reports when they disagree)
+    from timeline import load_show
+    return load_show().duration
 
 def create_timeline():
-    """Create a timeline of all events in the video"""
-    timeline = []
-    current_time = 0
-    
-    # Interleave dialogue and songs
-    timeline.append({"type": "dialogue", "content": DIALOGUE_SCENES[0], "start": current_time})
-    current_time += DIALOGUE_SCENES[0]["duration"]
-    
-    timeline.append({"type": "dialogue", "content": DIALOGUE_SCENES[1], "start": current_time})
-    current_time += DIALOGUE_SCENES[1]["duration"]
-    
-    timeline.append({"type": "song", "content": SONGS[0], "start": current_time})
-    current_time += SONGS[0]["duration"]
-    
-    timeline.append({"type": "dialogue", "content": DIALOGUE_SCENES[2], "start": current_time})
-    current_time += DIALOGUE_SCENES[2]["duration"]
-    
-    timeline.append({"type": "dialogue", "content": DIALOGUE_SCENES[3], "start": current_time})
-    current_time += DIALOGUE_SCENES[3]["duration"]
-    
-    timeline.append({"type": "song", "content": SONGS[1], "start": current_time})
-    current_time += SONGS[1]["duration"]
-    
-    timeline.append({"type": "dialogue", "content": DIALOGUE_SCENES[4], "start": current_time})
-    current_time += DIALOGUE_SCENES[4]["duration"]
-    
-    timeline.append({"type": "dialogue", "content": DIALOGUE_SCENES[5], "start": current_time})
-    current_time += DIALOGUE_SCENES[5]["duration"]
-    
-    timeline.append({"type": "song", "content": SONGS[2], "start": current_time})
-    current_time += SONGS[2]["duration"]
-    
-    timeline.append({"type": "dialogue", "content": DIALOGUE_SCENES[6], "start": current_time})
-    current_time += DIALOGUE_SCENES[6]["duration"]
+    """Create a timeline of all events in the video
     
-    return timeline, current_time
+    Kept for existing callers: the running order now lives in
+    shows/halloween_night.json and is built by timeline.load_show.
+    """
+    from timeline import load_show
+    show = load_show()
+    return show.legacy_timeline(), show.duration
 
 if __name__ == "__main__":
     timeline, total_duration = create_timeline()
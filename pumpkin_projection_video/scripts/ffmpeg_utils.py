@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Helpers for driving the ffmpeg command line tool
+"""
+
+import numpy as np
+import os
+import subprocess
+import tempfile
+
+FFMPEG = os.environ.get("FFMPEG_BINARY", "ffmpeg")
+
+def run_ffmpeg(args):
+    """Run ffmpeg quietly, raising RuntimeError with its output on failure"""
+    cmd = [FFMPEG, "-hide_banner", "-loglevel", "error", "-y"] + list(args)
+    result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    if result.returncode != 0:
+        raise RuntimeError(f"ffmpeg failed: {result.stderr.decode(errors='replace').strip()}")
+
+def write_concat_list(paths, list_path):
+    """Write an ffmpeg concat demuxer list file"""
+    with open(list_path, "w") as f:
+        for path in paths:
+            escaped = os.path.abspath(path).replace("'", "'\\''")
+            f.write(f"file '{escaped}'\n")
+
+def concat_videos(paths, output_path):
+    """Join videos with identical encoding settings without re-encoding"""
+    fd, list_path = tempfile.mkstemp(suffix=".txt")
+    os.close(fd)
+    try:
+        write_concat_list(paths, list_path)
+        run_ffmpeg(["-f", "concat", "-safe", "0", "-i", list_path,
+                    "-map", "0", "-c", "copy", output_path])
+    finally:
+        os.remove(list_path)
+    return output_path
+
+class FFmpegWriter:
+    """cv2.VideoWriter-style sink that pipes raw frames into a single ffmpeg encoder
+    
+    When audio_path is given the audio is looped/trimmed to the video length and
+    muxed in the same process, so there is no intermediate video file and only
+    one lossy generation.
+    """
+    
+    def __init__(self, output_path, width, height, fps, pix_fmt="bgr24", codec="libx264",
+                 bitrate=None, preset="medium", audio_path=None, audio_codec="aac"):
+        self.output_path = output_path
+        self.frame_shape = (height, width, 3)
+        self.frame_count = 0
+        
+        cmd = [FFMPEG, "-hide_banner", "-loglevel", "error", "-y",
+               "-f", "rawvideo", "-pix_fmt", pix_fmt, "-s", f"{width}x{height}",
+               "-r", str(fps), "-i", "-"]
+        if audio_path:
+            cmd += ["-stream_loop", "-1", "-i", audio_path]
+        
+        cmd += ["-map", "0:v:0", "-c:v", codec, "-pix_fmt", "yuv420p"]
+        if preset and codec in ("libx264", "libx265"):
+            cmd += ["-preset", preset]
+        if bitrate:
+            cmd += ["-b:v", str(bitrate)]
+        if audio_path:
+            cmd += ["-map", "1:a:0", "-c:a", audio_codec, "-shortest"]
+        cmd.append(output_path)
+        
+        # ffmpeg's messages go to a file: a pipe nobody reads until release() could
+        # fill up and stall the encoder
+        self.stderr = tempfile.TemporaryFile()
+        self.process = subprocess.Popen(cmd, stdin=subprocess.PIPE, stderr=self.stderr)
+        self.released = False
+    
+    def write(self, frame):
+        """Send one frame (height x width x 3 uint8) to the encoder"""
+        if frame.shape != self.frame_shape:
+            raise ValueError(f"Frame shape {frame.shape} does not match {self.frame_shape}")
+        try:
+            self.process.stdin.write(memoryview(np.ascontiguousarray(frame)))
+        except BrokenPipeError:
+            self.release()
+            raise
+        self.frame_count += 1
+    
+    def isOpened(self):
+        return self.process.poll() is None
+    
+    def release(self):
+        """Flush the encoder and raise if ffmpeg failed
+        
+        Only the first call does anything, so a caller's cleanup release() after
+        write() already failed doesn't replace ffmpeg's error with an empty one.
+        """
+        if self.released:
+            return
+        self.released = True
+        if self.process.stdin and not self.process.stdin.closed:
+            try:
+                self.process.stdin.close()
+            except BrokenPipeError:
+                pass
+        self.process.wait()
+        self.stderr.seek(0)
+        stderr = self.stderr.read().decode(errors='replace').strip()
+        self.stderr.close()
+        if self.process.returncode != 0:
+            raise RuntimeError(f"ffmpeg failed: {stderr or f'exit code {self.process.returncode}'}")
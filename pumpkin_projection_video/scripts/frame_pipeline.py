@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Threaded render/encode pipeline over a fixed ring of reusable frame buffers
+"""
+
+import queue
+import threading
+import numpy as np
+from instrumentation import Instrumentation
+
+# Marks the end of a queue
+_DONE = object()
+
+class FrameBufferRing:
+    """Preallocated frame buffers handed out and returned by index
+    
+    states[index] is the frame state a buffer currently holds (None when
+    empty), so renderers can update it in place instead of starting over.
+    """
+    
+    def __init__(self, count, shape, dtype=np.uint8):
+        self.buffers = [np.empty(shape, dtype=dtype) for _ in range(count)]
+        self.states = [None] * count
+        self.free = queue.Queue()
+        for index in range(count):
+            self.free.put(index)
+    
+    def acquire(self, stop):
+        """Block until a buffer is free (this is the backpressure); None once stop is set"""
+        while not stop.is_set():
+            try:
+                return self.free.get(timeout=0.1)
+            except queue.Empty:
+                pass
+        return None
+    
+    def release(self, index):
+        self.free.put(index)
+
+class ThreadedFramePipeline:
+    """Composites frames in worker threads while a separate thread encodes them in order
+    
+    render_into(buffer, state, previous_state) turns a buffer holding
+    previous_state's frame (None if empty) into the frame for state, and
+    write(frame) encodes it; NumPy and cv2 release the GIL for the heavy work, so
+    both overlap. At most len(ring) frames are in flight: when the encoder falls
+    behind, the producer waits for a buffer instead of allocating. The first
+    error in any thread stops the others and is re-raised from run().
+    
+    frame_key(state) returns what a frame's pixels depend on (None if they are
+    unique). A frame with the same key as the one before is not rendered at
+    all; the encoder writes its previous buffer again.
+    """
+    
+    def __init__(self, render_into, write, frame_shape, workers=2, buffers=None, instrumentation=None,
+                 frame_key=None):
+        self.render_into = render_into
+        self.write = write
+        self.frame_key = frame_key or (lambda state: None)
+        self.workers = workers
+        self.ring = FrameBufferRing(buffers or 2 * workers + 2, frame_shape)
+        self.instrumentation = instrumentation or Instrumentation()
+        self.error = None
+        self.error_lock = threading.Lock()
+        self.stop = threading.Event()
+        self.frames_written = 0
+        self.duplicates = 0
+    
+    def fail(self, error):
+        with self.error_lock:
+            if self.error is None:
+                self.error = error
+        self.stop.set()
+    
+    def run(self, states):
+        """Render and write every state in order; returns the number of frames written"""
+        jobs = queue.Queue()  # Bounded in practice by the buffer ring
+        rendered = queue.Queue()
+        
+        render_threads = [threading.Thread(target=self.render_worker, args=(jobs, rendered),
+                                           name=f"render-{index}", daemon=True)
+                          for index in range(self.workers)]
+        encode_thread = threading.Thread(target=self.encode_worker, args=(rendered,),
+                                         name="encode", daemon=True)
+        for thread in render_threads + [encode_thread]:
+            thread.start()
+        
+        try:
+            previous_key = None
+            for frame_index, state in enumerate(states):
+                if self.stop.is_set():
+                    break
+                key = self.frame_key(state)
+                if key is not None and key == previous_key:
+                    self.instrumentation.frame_start(frame_index)
+                    rendered.put((frame_index, None))
+                    continue
+                previous_key = key
+                
+                slot = self.ring.acquire(self.stop)
+                if slot is None:
+                    break
+                self.instrumentation.frame_start(frame_index)
+                jobs.put((frame_index, slot, state))
+        except BaseException as error:
+            # Includes KeyboardInterrupt, so the threads still shut down cleanly
+            self.fail(error)
+        finally:
+            for _ in render_threads:
+                jobs.put(_DONE)
+            for thread in render_threads:
+                thread.join()
+            rendered.put(_DONE)
+            encode_thread.join()
+        
+        if self.error is not None:
+            raise self.error
+        return self.frames_written
+    
+    def render_worker(self, jobs, rendered):
+        while True:
+            job = jobs.get()
+            if job is _DONE:
+                return
+            frame_index, slot, state = job
+            if self.stop.is_set():
+                self.ring.release(slot)
+                continue
+            try:
+                self.render_into(self.ring.buffers[slot], state, self.ring.states[slot])
+                self.ring.states[slot] = state
+            except BaseException as error:
+                self.ring.states[slot] = None  # Contents unknown
+                self.ring.release(slot)
+                self.fail(error)
+                continue
+            rendered.put((frame_index, slot))
+    
+    def encode_worker(self, rendered):
+        # Frames finish out of order across render threads; hold them until their turn.
+        # The last written buffer is kept back for repeats (slot None).
+        waiting = {}
+        next_index = 0
+        last_slot = None
+        while True:
+            item = rendered.get()
+            if item is _DONE:
+                break
+            frame_index, slot = item
+            waiting[frame_index] = slot
+            self.instrumentation.queue_depth("encoder queue", len(waiting) + rendered.qsize())
+            
+            while next_index in waiting:
+                slot = waiting.pop(next_index)
+                if slot is None:
+                    slot, last_slot = last_slot, None
+                    self.duplicates += 1
+                if not self.stop.is_set():
+                    try:
+                        with self.instrumentation.stage("encode"):
+                            self.write(self.ring.buffers[slot])
+                        self.frames_written += 1
+                        self.instrumentation.frame_end(next_index)
+                    except BaseException as error:
+                        self.fail(error)
+                if last_slot is not None:
+                    self.ring.release(last_slot)
+                last_slot = slot
+                next_index += 1
+        
+        for slot in waiting.values():
+            if slot is not None:
+                self.ring.release(slot)
+        if last_slot is not None:
+            self.ring.release(last_slot)
@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+Pluggable render callbacks: progress logging and Chrome trace output
+"""
+
+import contextlib
+import json
+import threading
+import time
+from collections import deque
+
+class RenderObserver:
+    """Base class for render callbacks; override the events you need
+    
+    Times are time.perf_counter() seconds.
+    """
+    
+    def on_render_start(self, total_frames):
+        pass
+    
+    def on_frame_start(self, frame_index, start):
+        pass
+    
+    def on_frame_end(self, frame_index, end):
+        pass
+    
+    def on_stage(self, name, start, end):
+        pass
+    
+    def on_cache_hit(self, key):
+        pass
+    
+    def on_cache_miss(self, key):
+        pass
+    
+    def on_queue_depth(self, name, depth):
+        pass
+    
+    def on_render_end(self, frame_count):
+        pass
+
+class _Stage:
+    """Context manager that reports how long a named stage took"""
+    
+    def __init__(self, instrumentation, name):
+        self.instrumentation = instrumentation
+        self.name = name
+    
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+    
+    def __exit__(self, *exc_info):
+        end = time.perf_counter()
+        for observer in self.instrumentation.observers:
+            observer.on_stage(self.name, self.start, end)
+        return False
+
+_NO_STAGE = contextlib.nullcontext()
+
+class Instrumentation:
+    """Dispatches render events to observers; costs almost nothing when there are none"""
+    
+    def __init__(self, observers=()):
+        self.observers = list(observers)
+    
+    def add(self, observer):
+        self.observers.append(observer)
+        return observer
+    
+    def remove(self, observer):
+        self.observers.remove(observer)
+    
+    def render_start(self, total_frames):
+        for observer in self.observers:
+            observer.on_render_start(total_frames)
+    
+    def render_end(self, frame_count):
+        for observer in self.observers:
+            observer.on_render_end(frame_count)
+    
+    def frame_start(self, frame_index):
+        if self.observers:
+            start = time.perf_counter()
+            for observer in self.observers:
+                observer.on_frame_start(frame_index, start)
+    
+    def frame_end(self, frame_index):
+        if self.observers:
+            end = time.perf_counter()
+            for observer in self.observers:
+                observer.on_frame_end(frame_index, end)
+    
+    def stage(self, name):
+        """with instrumentation.stage("composite"): ... times the block"""
+        if not self.observers:
+            return _NO_STAGE
+        return _Stage(self, name)
+    
+    def cache_hit(self, key):
+        for observer in self.observers:
+            observer.on_cache_hit(key)
+    
+    def cache_miss(self, key):
+        for observer in self.observers:
+            observer.on_cache_miss(key)
+    
+    def queue_depth(self, name, depth):
+        for observer in self.observers:
+            observer.on_queue_depth(name, depth)
+    
+    def timed_frames(self, frames):
+        """Wrap a frame iterator so each frame is timed from production until the consumer is done with it"""
+        frame_index = 0
+        frames = iter(frames)
+        while True:
+            self.frame_start(frame_index)
+            try:
+                frame = next(frames)
+            except StopIteration:
+                return
+            yield frame
+            self.frame_end(frame_index)
+            frame_index += 1
+
+def format_duration(seconds):
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}h{minutes:02d}m{seconds:02d}s" if hours else f"{minutes}m{seconds:02d}s"
+
+class ProgressLogger(RenderObserver):
+    """Prints progress with a rolling frame rate and an ETA every few seconds"""
+    
+    def __init__(self, interval=5.0, window=10.0, clock=time.perf_counter):
+        self.interval = interval
+        self.window = window
+        self.clock = clock
+        self.total_frames = None
+        self.frames_done = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.history = deque()  # (time, frames done)
+        self.last_report = None
+    
+    def on_render_start(self, total_frames):
+        self.total_frames = total_frames
+        self.start_time = self.last_report = self.clock()
+        self.history.append((self.start_time, 0))
+    
+    def on_frame_end(self, frame_index, end):
+        self.frames_done += 1
+        now = self.clock()
+        self.history.append((now, self.frames_done))
+        while len(self.history) > 2 and now - self.history[0][0] > self.window:
+            self.history.popleft()
+        if now - self.last_report >= self.interval:
+            self.last_report = now
+            self.report()
+    
+    def on_cache_hit(self, key):
+        self.cache_hits += 1
+    
+    def on_cache_miss(self, key):
+        self.cache_misses += 1
+    
+    def rolling_fps(self):
+        (first_time, first_frames), (last_time, last_frames) = self.history[0], self.history[-1]
+        elapsed = last_time - first_time
+        return (last_frames - first_frames) / elapsed if elapsed > 0 else 0.0
+    
+    def report(self):
+        fps = self.rolling_fps()
+        line = f"Frame {self.frames_done}"
+        if self.total_frames:
+            line += f"/{self.total_frames} ({100 * self.frames_done / self.total_frames:.1f}%)"
+        line += f", {fps:.1f} fps"
+        if self.total_frames and fps > 0:
+            line += f", ETA {format_duration((self.total_frames - self.frames_done) / fps)}"
+        lookups = self.cache_hits + self.cache_misses
+        if lookups:
+            line += f", frame cache {100 * self.cache_hits / lookups:.0f}% hits"
+        print(line)
+    
+    def on_render_end(self, frame_count):
+        elapsed = self.clock() - self.start_time
+        print(f"Rendered {frame_count} frames in {format_duration(elapsed)} "
+              f"({frame_count / elapsed if elapsed > 0 else 0:.1f} fps average)")
+
+class ChromeTraceWriter(RenderObserver):
+    """Records frames, stages, cache lookups and queue depths in Chrome trace format
+    
+    Open the written JSON in chrome://tracing or https://ui.perfetto.dev.
+    """
+    
+    def __init__(self, path):
+        self.path = path
+        self.events = []
+        self.frame_starts = {}
+        self.origin = time.perf_counter()
+    
+    def timestamp(self, t):
+        return (t - self.origin) * 1e6  # microseconds
+    
+    def on_frame_start(self, frame_index, start):
+        self.frame_starts[frame_index] = start
+    
+    def on_frame_end(self, frame_index, end):
+        start = self.frame_starts.pop(frame_index, None)
+        if start is not None:
+            self.add_span(f"frame {frame_index}", "frame", start, end, {"frame": frame_index})
+    
+    def on_stage(self, name, start, end):
+        self.add_span(name, "stage", start, end)
+    
+    def on_cache_hit(self, key):
+        self.add_instant("cache hit", {"key": str(key)})
+    
+    def on_cache_miss(self, key):
+        self.add_instant("cache miss", {"key": str(key)})
+    
+    def on_queue_depth(self, name, depth):
+        self.events.append({"name": name, "ph": "C", "ts": self.timestamp(time.perf_counter()),
+                            "pid": 0, "args": {"depth": depth}})
+    
+    def add_span(self, name, category, start, end, args=None):
+        self.events.append({"name": name, "cat": category, "ph": "X", "ts": self.timestamp(start),
+                            "dur": (end - start) * 1e6, "pid": 0, "tid": threading.get_ident(),
+                            "args": args or {}})
+    
+    def add_instant(self, name, args):
+        self.events.append({"name": name, "ph": "i", "s": "t", "ts": self.timestamp(time.perf_counter()),
+                            "pid": 0, "tid": threading.get_ident(), "args": args})
+    
+    def on_render_end(self, frame_count):
+        self.write()
+    
+    def write(self):
+        with open(self.path, "w") as f:
+            json.dump({"traceEvents": self.events, "displayTimeUnit": "ms"}, f)
+        print(f"Trace saved as {self.path}")
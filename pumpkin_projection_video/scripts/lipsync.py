@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Compile dialogue lines and songs into per-frame mouth-shape tracks
+"""
+
+import re
+from functools import lru_cache
+import numpy as np
+from asset_cache import MOUTH_SHAPES
+from audio_analysis import median_window, smooth_envelope
+
+EFFECTS = ["normal", "spooky"]
+
+MOUTH_IDS = {mouth_shape: index for index, mouth_shape in enumerate(MOUTH_SHAPES)}
+EFFECT_IDS = {effect: index for index, effect in enumerate(EFFECTS)}
+
+CLOSED = MOUTH_IDS["closed"]
+
+# Letter pairs that sound unlike their letters on their own; both letters get this shape
+DIGRAPH_MOUTHS = {
+    "ph": "open_wide",  # sounds like f
+}
+
+def mouth_for_char(char):
+    """Map characters to mouth shapes for basic lip sync"""
+    vowels = "aeiouAEIOU"
+    consonants_open = "bpmBPM"
+    consonants_wide = "fvFV"
+    
+    if char in vowels:
+        return "open_medium"
+    elif char in consonants_open:
+        return "closed"
+    elif char in consonants_wide:
+        return "open_wide"
+    elif char.isalpha():
+        return "open_small"
+    else:
+        return "closed"
+
+# Mouth ID for every Latin-1 code point; anything beyond is looked up one by one
+CHAR_MOUTHS = np.array([MOUTH_IDS[mouth_for_char(chr(code))] for code in range(256)], dtype=np.uint8)
+
+DIGRAPH_PATTERN = re.compile("|".join(map(re.escape, DIGRAPH_MOUTHS)), re.IGNORECASE) if DIGRAPH_MOUTHS else None
+
+def text_mouths(text):
+    """Mouth ID for each character of text, with digraph rules applied"""
+    codes = np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32)
+    mouths = CHAR_MOUTHS[np.minimum(codes, 255)]
+    for index in np.nonzero(codes > 255)[0]:
+        mouths[index] = MOUTH_IDS[mouth_for_char(text[index])]
+    
+    if DIGRAPH_PATTERN is not None:
+        for match in DIGRAPH_PATTERN.finditer(text):
+            mouths[match.start():match.end()] = MOUTH_IDS[DIGRAPH_MOUTHS[match.group().lower()]]
+    return mouths
+
+@lru_cache(maxsize=256)
+def compile_line(speaker, text, frame_count):
+    """(frame_count, 3) uint8 track of [pumpkin1 mouth, pumpkin2 mouth, effect] for a dialogue line
+    
+    The text is spread evenly over the line; the listener stays closed (idle
+    blinks are added at render time because they depend on the seed).
+    """
+    track = np.zeros((frame_count, 3), dtype=np.uint8)  # closed, closed, normal
+    if text and frame_count > 0:
+        # Same float arithmetic as int(frame_num / frame_count * len(text))
+        char_index = (np.arange(frame_count) / frame_count * len(text)).astype(np.int64)
+        speaking = text_mouths(text)[np.minimum(char_index, len(text) - 1)]
+        speaking[char_index >= len(text)] = CLOSED
+        track[:, 0 if speaker == 1 else 1] = speaking
+    track.setflags(write=False)
+    return track
+
+def compile_song_pattern():
+    """One period of the song animation: both pumpkins alternate emphasis every
+    15 frames in a 60-frame cycle, and the background pulses every 12 frames"""
+    frames = np.arange(120)
+    cycle_pos = frames % 60
+    conditions = [cycle_pos < 15, cycle_pos < 30, cycle_pos < 45]
+    pattern = np.empty((len(frames), 3), dtype=np.uint8)
+    pattern[:, 0] = np.select(conditions, [MOUTH_IDS["singing"], MOUTH_IDS["open_medium"], MOUTH_IDS["singing"]],
+                              MOUTH_IDS["open_small"])
+    pattern[:, 1] = np.select(conditions, [MOUTH_IDS["open_medium"], MOUTH_IDS["singing"], MOUTH_IDS["singing"]],
+                              MOUTH_IDS["open_small"])
+    pattern[:, 2] = np.where((frames // 12) % 2 == 0, EFFECT_IDS["spooky"], EFFECT_IDS["normal"])
+    pattern.setflags(write=False)
+    return pattern
+
+SONG_PATTERN = compile_song_pattern()
+
+def compile_song(frame_count):
+    """(frame_count, 3) uint8 track for a song"""
+    track = SONG_PATTERN[np.arange(frame_count) % len(SONG_PATTERN)]
+    track.setflags(write=False)
+    return track
+
+def compile_segment(segment):
+    """Track for one timeline segment"""
+    if segment['type'] == 'dialogue':
+        line = segment['content']
+        return compile_line(line['speaker'], line['text'], segment['frame_count'])
+    return compile_song(segment['frame_count'])
+
+# Envelope thresholds (normalized loudness) for each step of mouth openness
+OPENNESS = ["closed", "open_small", "open_medium", "open_wide"]
+OPENNESS_THRESHOLDS = [0.3, 0.6, 0.85]
+OPENNESS_IDS = np.array([MOUTH_IDS[mouth_shape] for mouth_shape in OPENNESS], dtype=np.uint8)
+
+# Mouths follow loudness averaged over this many frames, so they don't jitter
+OPENNESS_SMOOTHING = 3
+
+# Openness spans this many dB under and over a segment's median loudness
+OPENNESS_WINDOW_DB = (4.0, 2.0)
+
+# Quieter than this (dBFS) counts as silence
+SILENCE_DB = -60.0
+
+# The background decides spooky or normal once per block, the rhythm of the fixed pulse
+PULSE_FRAMES = 12
+
+def envelope_openness(envelope):
+    """Index into OPENNESS for each frame of a normalized envelope"""
+    return np.searchsorted(OPENNESS_THRESHOLDS, envelope, side="right")
+
+def envelope_pulse(envelope, block=PULSE_FRAMES):
+    """Effect ID per frame: spooky for the blocks louder than the segment's median block"""
+    if len(envelope) == 0:
+        return np.zeros(0, dtype=np.uint8)
+    starts = np.arange(0, len(envelope), block)
+    counts = np.diff(np.append(starts, len(envelope)))
+    levels = np.add.reduceat(envelope, starts, dtype=np.float64) / counts
+    louder = levels > np.median(levels)
+    return np.repeat(np.where(louder, EFFECT_IDS["spooky"], EFFECT_IDS["normal"]), counts).astype(np.uint8)
+
+def apply_envelope(track, levels_db, segment_type, speaker=None):
+    """Track with mouth openness, and for songs the spooky pulse, driven by the
+    per-frame loudness in dBFS (one value per track row)
+    
+    Openness is measured on a dB window around the segment's median loudness,
+    so a steady backing bed still animates and loud one-off sounds don't
+    shut every other frame. Dialogue keeps the text's closures (b/p/m, spaces,
+    punctuation) and the listener's shapes; every other speaking frame opens
+    as far as the audio is loud. In songs the lead never closes while there is
+    sound and keeps "singing" when the audio is at least medium, and the
+    background is spooky for each 12-frame block that is louder than usual for
+    that song.
+    """
+    smoothed = smooth_envelope(levels_db, OPENNESS_SMOOTHING)
+    openness = envelope_openness(median_window(smoothed, *OPENNESS_WINDOW_DB))
+    track = track.copy()
+    
+    if segment_type == 'dialogue':
+        column = 0 if speaker == 1 else 1
+        speaking = track[:, column]
+        track[:, column] = np.where(speaking == CLOSED, CLOSED, OPENNESS_IDS[np.maximum(openness, 1)])
+    else:
+        singing = MOUTH_IDS["singing"]
+        lead_openness = np.where(smoothed > SILENCE_DB, np.maximum(openness, 1), 0)
+        for column in (0, 1):
+            lead = track[:, column] == singing
+            track[:, column] = np.where(lead & (openness >= 2), singing,
+                                        OPENNESS_IDS[np.where(lead, lead_openness, openness)])
+        track[:, 2] = envelope_pulse(levels_db)
+    
+    track.setflags(write=False)
+    return track
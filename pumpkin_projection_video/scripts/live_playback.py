@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Real-time playback of the pumpkin show, rendered frame by frame
+"""
+
+import argparse
+import os
+import time
+import cv2
+from asset_cache import PROJECT_DIR
+
+class FramePacer:
+    """Holds a steady frame rate against a wall clock, dropping frames instead of drifting"""
+    
+    def __init__(self, fps, clock=time.perf_counter, sleep=time.sleep, late_tolerance=0.5):
+        self.fps = fps
+        self.clock = clock
+        self.sleep = sleep
+        # A frame presented more than this fraction of a frame after its deadline counts as late
+        self.late_tolerance = late_tolerance
+        self.start_time = None
+        self.reset_stats()
+    
+    def reset_stats(self):
+        self.presented = 0
+        self.dropped = 0
+        self.late = 0
+        self.total_lateness = 0.0
+        self.max_lateness = 0.0
+    
+    def start(self):
+        self.start_time = self.clock()
+    
+    def deadline(self, frame_index):
+        return self.start_time + frame_index / self.fps
+    
+    def current_frame(self):
+        """Index of the frame that should be on screen right now"""
+        return int((self.clock() - self.start_time) * self.fps)
+    
+    def next_frame(self, frame_index):
+        """Pick the next frame to render after frame_index, skipping ones already too late"""
+        due = self.current_frame()
+        if due > frame_index + 1:
+            self.dropped += due - frame_index - 1
+            return due
+        return frame_index + 1
+    
+    def present(self, frame_index):
+        """Wait until frame_index is due, then record how late it actually was"""
+        wait = self.deadline(frame_index) - self.clock()
+        if wait > 0:
+            self.sleep(wait)
+        lateness = max(0.0, self.clock() - self.deadline(frame_index))
+        self.presented += 1
+        self.total_lateness += lateness
+        self.max_lateness = max(self.max_lateness, lateness)
+        if lateness > self.late_tolerance / self.fps:
+            self.late += 1
+    
+    def stats(self):
+        return {
+            "fps": self.fps,
+            "frames_presented": self.presented,
+            "frames_dropped": self.dropped,
+            "frames_late": self.late,
+            "mean_lateness_ms": 1000 * self.total_lateness / max(self.presented, 1),
+            "max_lateness_ms": 1000 * self.max_lateness
+        }
+
+class NullSink:
+    """Discards frames; used for headless runs and tests"""
+    
+    def show(self, frame):
+        return True
+    
+    def close(self):
+        pass
+
+class WindowSink:
+    """Fullscreen OpenCV window; show() returns False once Esc or q is pressed"""
+    
+    def __init__(self, name="Pumpkins", fullscreen=True):
+        self.name = name
+        cv2.namedWindow(name, cv2.WINDOW_NORMAL)
+        if fullscreen:
+            cv2.setWindowProperty(name, cv2.WND_PROP_FULLSCREEN, cv2.WINDOW_FULLSCREEN)
+    
+    def show(self, frame):
+        cv2.imshow(self.name, frame)
+        return cv2.waitKey(1) & 0xFF not in (27, ord('q'))
+    
+    def close(self):
+        cv2.destroyWindow(self.name)
+
+class AudioPlayer:
+    """Plays a WAV file with simpleaudio when it is installed, otherwise stays silent"""
+    
+    def __init__(self, path):
+        self.path = path
+        self.wave = None
+        self.playback = None
+        try:
+            import simpleaudio
+            self.wave = simpleaudio.WaveObject.from_wave_file(path)
+        except ImportError:
+            print("simpleaudio is not installed - playing without sound")
+    
+    def play(self):
+        self.stop()
+        if self.wave is not None:
+            self.playback = self.wave.play()
+    
+    def stop(self):
+        if self.playback is not None:
+            self.playback.stop()
+            self.playback = None
+
+class LivePlayer:
+    """Renders the show on the fly and presents it through a sink at a fixed rate
+    
+    The pacer's clock starts together with the audio, so picture and sound stay
+    in sync; if rendering falls behind, frames are skipped rather than delayed.
+    """
+    
+    def __init__(self, creator, sink=None, audio_path=None, clock=time.perf_counter,
+                 sleep=time.sleep):
+        self.creator = creator
+        self.sink = sink or NullSink()
+        self.audio = AudioPlayer(audio_path) if audio_path else None
+        self.pacer = FramePacer(creator.fps, clock=clock, sleep=sleep)
+    
+    def play_show(self, max_frames=None):
+        """Play the timeline once; returns False if the sink asked to stop"""
+        timeline = self.creator.get_timeline()
+        frame_index = 0
+        
+        if self.audio:
+            self.audio.play()
+        self.pacer.start()
+        
+        while frame_index < timeline.total_frames and (max_frames is None or frame_index < max_frames):
+            # Frames are rendered by index, so skipped ones cost nothing
+            frame = self.creator.render_frame(frame_index)
+            self.pacer.present(frame_index)
+            if not self.sink.show(frame):
+                return False
+            frame_index = self.pacer.next_frame(frame_index)
+        
+        return True
+    
+    def run(self, loop=True, max_frames=None):
+        """Play the show (forever when loop is set) and return pacing statistics"""
+        self.pacer.reset_stats()
+        try:
+            while self.play_show(max_frames) and loop and max_frames is None:
+                pass
+        finally:
+            if self.audio:
+                self.audio.stop()
+            self.sink.close()
+        return self.pacer.stats()
+
+def main():
+    from create_video_opencv import PumpkinVideoCreator
+    
+    parser = argparse.ArgumentParser(description="Play the pumpkin show live")
+    parser.add_argument("--width", type=int, default=1920)
+    parser.add_argument("--height", type=int, default=1080)
+    parser.add_argument("--fps", type=int, default=24)
+    parser.add_argument("--audio", default=os.path.join(PROJECT_DIR, "audio", "halloween_background.wav"))
+    parser.add_argument("--headless", action="store_true", help="render to a null sink and print pacing stats")
+    parser.add_argument("--frames", type=int, default=None, help="stop after this many frames")
+    args = parser.parse_args()
+    
+    sink = NullSink() if args.headless else WindowSink()
+    audio_path = args.audio if not args.headless and os.path.exists(args.audio) else None
+    # Mouths follow the soundtrack that is actually playing
+    creator = PumpkinVideoCreator(width=args.width, height=args.height, fps=args.fps, audio_path=audio_path)
+    
+    stats = LivePlayer(creator, sink, audio_path).run(loop=args.frames is None, max_frames=args.frames)
+    for name, value in stats.items():
+        print(f"{name}: {value:.2f}" if isinstance(value, float) else f"{name}: {value}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Vectorized firefly particle system for the spooky background effect
+"""
+
+import numpy as np
+
+# Where a particle reappears after each lifetime, as a fraction of the screen.
+# Irrational steps keep respawn points from repeating.
+RESPAWN_STEP = np.array([0.6180339887, 0.7548776662])
+
+class FireflySystem:
+    """Seeded fireflies whose state at any frame is computed in bulk with NumPy"""
+
+    def __init__(self, width, height, count=12, seed=0, fps=24, min_size=2, max_size=6):
+        self.width = width
+        self.height = height
+        self.count = count
+        self.frame = 0
+        self.screen = np.array([width, height], dtype=np.float64)
+
+        rng = np.random.default_rng(seed)
+        self.origins = rng.uniform(0, 1, (count, 2)) * self.screen
+        self.velocities = rng.normal(0, 30 / fps, (count, 2))  # Pixels per frame
+        self.lifetimes = rng.integers(fps * 2, fps * 6, count)  # Frames
+        self.phases = rng.integers(0, self.lifetimes)
+        self.sizes = rng.integers(min_size, max_size + 1, count)
+        self.colors = np.stack([
+            rng.integers(100, 256, count),  # BGR format
+            np.full(count, 255),
+            np.full(count, 255)
+        ], axis=1).astype(np.float32)
+
+        # Disc pixel offsets per radius, so drawing is one gather/scatter per size
+        self.sprites = {}
+        for radius in np.unique(self.sizes):
+            dy, dx = np.mgrid[-radius:radius + 1, -radius:radius + 1]
+            inside = dx * dx + dy * dy <= radius * radius
+            self.sprites[int(radius)] = (np.flatnonzero(self.sizes == radius),
+                                         dy[inside], dx[inside])
+
+    def state_at(self, frame_index):
+        """Positions (int x, y) and brightness (0..1) of every particle at a frame"""
+        ticks = frame_index + self.phases
+        generation = ticks // self.lifetimes
+        age = ticks % self.lifetimes
+
+        positions = (self.origins
+                     + generation[:, None] * RESPAWN_STEP * self.screen
+                     + self.velocities * age[:, None])
+        positions = np.mod(positions, self.screen).astype(np.int64)
+
+        # Fade in and out over each lifetime, fully lit for most of it
+        brightness = np.minimum(1.0, 3.0 * np.sin(np.pi * (age + 0.5) / self.lifetimes))
+        return positions, brightness.astype(np.float32)
+
+    def advance(self, frames=1):
+        """Step the system's own clock forward"""
+        self.frame += frames
+
+    def render(self, frame, frame_index=None):
+        """Draw the fireflies onto a BGR frame in place"""
+        if frame_index is None:
+            frame_index = self.frame
+            self.advance()
+
+        positions, brightness = self.state_at(frame_index)
+        height, width = frame.shape[:2]
+
+        for radius, (members, dy, dx) in self.sprites.items():
+            ys = positions[members, 1, None] + dy
+            xs = positions[members, 0, None] + dx
+            inside = (ys >= 0) & (ys < height) & (xs >= 0) & (xs < width)
+
+            alpha = np.broadcast_to(brightness[members, None], ys.shape)[inside][:, None]
+            color = np.broadcast_to(self.colors[members, None, :], ys.shape + (3,))[inside]
+            ys, xs = ys[inside], xs[inside]
+
+            dst = frame[ys, xs].astype(np.float32)
+            frame[ys, xs] = (dst + (color - dst) * alpha + 0.5).astype(np.uint8)
+
+        return frame
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Content-addressed on-disk cache for rendered timeline segments
+"""
+
+import glob
+import hashlib
+import json
+import os
+import time
+
+# Bump when the cached file layout or hashing scheme changes
+CACHE_FORMAT_VERSION = 1
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_DIR = os.path.dirname(SCRIPTS_DIR)
+# Anchored at the project, so runs from any working directory share one cache
+RENDER_CACHE_DIR = os.path.join(PROJECT_DIR, ".render_cache")
+
+# Default eviction limits for incremental renders
+DEFAULT_MAX_BYTES = 8 * 2**30
+DEFAULT_MAX_AGE_DAYS = 30
+
+def content_digest(obj):
+    """Stable SHA-256 of any JSON-serialisable value"""
+    payload = json.dumps(obj, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def file_digest(path):
+    """SHA-256 of a file's bytes"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def source_digest(filenames):
+    """Hash of renderer source files (in scripts/) so code changes invalidate cached output"""
+    return content_digest({name: file_digest(os.path.join(SCRIPTS_DIR, name))
+                           for name in sorted(filenames)})
+
+class SegmentRenderCache:
+    """Stores encoded files under their content hash and evicts by size and age"""
+
+    def __init__(self, cache_dir=RENDER_CACHE_DIR, max_bytes=None, max_age_days=None):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.max_age_days = max_age_days
+        self.reused = []
+        self.rebuilt = []
+        self.evicted = []
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def path_for(self, key, extension=".mp4"):
+        return os.path.join(self.cache_dir, key + extension)
+
+    def lookup(self, key, extension=".mp4"):
+        """Return the cached path for key, or None if it has to be rebuilt"""
+        path = self.path_for(key, extension)
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            os.utime(path)  # Mark as recently used for eviction
+            return path
+        return None
+
+    def temp_path_for(self, key, extension=".mp4"):
+        """Path to render into before store() publishes it"""
+        return os.path.join(self.cache_dir, f"{key}.{os.getpid()}.tmp{extension}")
+
+    def store(self, temp_path, key, extension=".mp4"):
+        """Atomically move a finished render into the cache"""
+        path = self.path_for(key, extension)
+        os.replace(temp_path, path)
+        return path
+
+    def record(self, label, reused):
+        (self.reused if reused else self.rebuilt).append(label)
+
+    def evict(self):
+        """Drop entries older than max_age_days, then the least recently used over max_bytes"""
+        entries = []
+        for path in glob.glob(os.path.join(self.cache_dir, "*")):
+            if os.path.isfile(path):
+                stat = os.stat(path)
+                entries.append((stat.st_mtime, stat.st_size, path))
+        entries.sort()
+
+        now = time.time()
+        kept = []
+        for mtime, size, path in entries:
+            if self.max_age_days is not None and now - mtime > self.max_age_days * 86400:
+                self._remove(path)
+            else:
+                kept.append((mtime, size, path))
+
+        if self.max_bytes is not None:
+            total = sum(size for _, size, _ in kept)
+            for mtime, size, path in kept:
+                if total <= self.max_bytes:
+                    break
+                self._remove(path)
+                total -= size
+
+        return self.evicted
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+            self.evicted.append(os.path.basename(path))
+        except OSError:
+            pass
+
+    def print_report(self):
+        print(f"Render cache: {len(self.reused)} reused, {len(self.rebuilt)} rebuilt, "
+              f"{len(self.evicted)} evicted")
+        for label in self.rebuilt:
+            print(f"  rebuilt: {label}")
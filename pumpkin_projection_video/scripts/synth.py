@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Vectorized NumPy audio synthesis for the pumpkin soundtrack
+"""
+
+import numpy as np
+
+SAMPLE_RATE = 44100  # Same default as pydub's generators
+
+def db_to_gain(db):
+    """Convert a dB change to a linear amplitude factor"""
+    return 10 ** (db / 20)
+
+def ms_to_samples(ms, sample_rate=SAMPLE_RATE):
+    return int(round(ms * sample_rate / 1000))
+
+def sine(frequency, n_samples, sample_rate=SAMPLE_RATE, gain_db=0.0):
+    """Full-scale sine starting at phase 0, as float32 in [-1, 1]"""
+    t = np.arange(n_samples, dtype=np.float64)
+    tone = np.sin(t * (2 * np.pi * frequency / sample_rate))
+    return (tone * db_to_gain(gain_db)).astype(np.float32)
+
+def apply_fades(signal, fade_in_samples=0, fade_out_samples=0):
+    """Linear fade in/out applied in place"""
+    fade_in_samples = min(fade_in_samples, len(signal))
+    fade_out_samples = min(fade_out_samples, len(signal))
+    if fade_in_samples:
+        signal[:fade_in_samples] *= np.linspace(0, 1, fade_in_samples, endpoint=False, dtype=np.float32)
+    if fade_out_samples:
+        signal[-fade_out_samples:] *= np.linspace(1, 0, fade_out_samples, endpoint=False, dtype=np.float32)
+    return signal
+
+def mix_into(buffer, signal, position):
+    """Add signal into buffer starting at sample position, clipped to the buffer"""
+    start = max(0, position)
+    end = min(len(buffer), position + len(signal))
+    if start < end:
+        buffer[start:end] += signal[start - position:end - position]
+    return buffer
+
+def spooky_tone(frequency, n_samples, fade_in=0, fade_out=0, sample_rate=SAMPLE_RATE):
+    """Base tone plus a fifth (-20 dB) and an octave (-30 dB), with fades in samples"""
+    tone = sine(frequency, n_samples, sample_rate)
+    tone += sine(frequency * 1.5, n_samples, sample_rate, gain_db=-20)
+    tone += sine(frequency * 2, n_samples, sample_rate, gain_db=-30)
+    return apply_fades(tone, fade_in, fade_out)
+
+class StreamingLowPass:
+    """Windowed-sinc FIR low-pass that keeps its history between blocks"""
+    
+    def __init__(self, cutoff_hz, sample_rate=SAMPLE_RATE, taps=255):
+        n = np.arange(taps) - (taps - 1) / 2
+        kernel = np.sinc(2 * cutoff_hz / sample_rate * n) * np.hamming(taps)
+        self.kernel = (kernel / kernel.sum()).astype(np.float32)
+        self.history = np.zeros(taps - 1, dtype=np.float32)
+    
+    def process(self, block):
+        """Filter one block; output has the same length as the input"""
+        padded = np.concatenate([self.history, block])
+        self.history = padded[len(padded) - len(self.history):]
+        return np.convolve(padded, self.kernel, mode="valid").astype(np.float32)
+
+def to_audio_segment(buffer, sample_rate=SAMPLE_RATE):
+    """Export a float buffer as a 16-bit mono pydub AudioSegment"""
+    from pydub import AudioSegment
+    
+    samples = np.clip(buffer, -1.0, 1.0) * 32767
+    return AudioSegment(
+        data=samples.astype(np.int16).tobytes(),
+        sample_width=2,
+        frame_rate=sample_rate,
+        channels=1
+    )
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Show timelines loaded from data files, with frame-accurate offsets and lookup
+"""
+
+import hashlib
+import json
+import os
+from bisect import bisect_right
+from lipsync import apply_envelope, compile_segment
+from render_cache import content_digest
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+SHOW_DIR = os.path.join(os.path.dirname(SCRIPTS_DIR), "shows")
+DEFAULT_SHOW = os.path.join(SHOW_DIR, "halloween_night.json")
+
+ITEM_TYPES = ["dialogue", "song"]
+
+def item_label(item):
+    return item['content'].get('scene', item['content'].get('title', 'Unknown'))
+
+def item_parts(item):
+    """The independently timed pieces of an item: each dialogue line, or the whole song"""
+    if item['type'] == 'dialogue':
+        return item['content']['lines']
+    return [item['content']]
+
+class Timeline:
+    """A show as a list of segments (one per dialogue line or song) on a frame grid
+    
+    Segment boundaries are rounded from the running time in seconds, so
+    fractional durations never accumulate drift. segment_at() finds what is
+    playing at any frame by binary search over the segment start frames.
+    Each segment carries its compiled lip-sync "track" (see lipsync.py).
+    """
+    
+    def __init__(self, items, fps=24, title=None):
+        self.items = [{"type": item['type'], "content": item['content']} for item in items]
+        self.fps = fps
+        self.title = title
+        self.segments = []
+        
+        start_time = 0
+        for item_index, item in enumerate(self.items):
+            if item['type'] not in ITEM_TYPES:
+                raise ValueError(f"Unknown timeline item type: {item['type']}")
+            item['start'] = start_time
+            
+            for part in item_parts(item):
+                duration = part.get('duration')
+                if not isinstance(duration, (int, float)) or duration <= 0:
+                    raise ValueError(f"{item['type']} '{item_label(item)}' has an invalid duration: {duration!r}")
+                end_time = start_time + duration
+                content_key = content_digest({"type": item['type'], "content": part})
+                start_frame = round(start_time * fps)
+                end_frame = round(end_time * fps)
+                # The rounded frame count depends on where the segment falls in the
+                # show, so it is part of the key that cached renders are found by
+                key = content_digest([content_key, end_frame - start_frame])
+                self.segments.append({
+                    "index": len(self.segments),
+                    "item_index": item_index,
+                    "type": item['type'],
+                    "label": item_label(item),
+                    "content": part,
+                    "start_frame": start_frame,
+                    "end_frame": end_frame,
+                    "frame_count": end_frame - start_frame,
+                    "key": key,
+                    # Randomness is keyed on content rather than position, so an
+                    # edit elsewhere in the show doesn't change this segment
+                    "clock": int(content_key[:8], 16)
+                })
+                self.segments[-1]['track'] = compile_segment(self.segments[-1])
+                start_time = end_time
+            
+            item['duration'] = start_time - item['start']
+        
+        self.duration = start_time
+        self.total_frames = self.segments[-1]['end_frame'] if self.segments else 0
+        self.start_frames = [segment['start_frame'] for segment in self.segments]
+    
+    def segment_at(self, frame_index):
+        """(segment, frame within the segment) playing at frame_index"""
+        if not 0 <= frame_index < self.total_frames:
+            raise IndexError(f"Frame {frame_index} is outside the show (0-{self.total_frames - 1})")
+        segment = self.segments[bisect_right(self.start_frames, frame_index) - 1]
+        return segment, frame_index - segment['start_frame']
+    
+    def apply_envelope(self, envelope):
+        """Re-drive every segment's track from the per-frame loudness (dBFS) of the
+        soundtrack (one value per frame of the show, see audio_analysis.py)
+        
+        The envelope slice is folded into each segment's key, so cached renders
+        made with other audio are not reused; the clock, and with it the
+        segment's randomness, stays the same.
+        """
+        if len(envelope) < self.total_frames:
+            raise ValueError(f"Envelope covers {len(envelope)} frames, the show has {self.total_frames}")
+        for segment in self.segments:
+            part = envelope[segment['start_frame']:segment['end_frame']]
+            speaker = segment['content'].get('speaker')
+            segment['track'] = apply_envelope(segment['track'], part, segment['type'], speaker)
+            segment['key'] = content_digest([segment['key'], hashlib.sha256(part.tobytes()).hexdigest()])
+        return self
+    
+    def validate(self):
+        """Human-readable problems with the declared durations (empty when consistent)"""
+        problems = []
+        for item in self.items:
+            content = item['content']
+            if item['type'] == 'dialogue':
+                if 'duration' in content and content['duration'] != item['duration']:
+                    problems.append(f"Scene '{item_label(item)}' declares {content['duration']}s "
+                                    f"but its lines last {item['duration']}s")
+            elif item['type'] == 'song':
+                lyrics_duration = sum(lyric['duration'] for lyric in content.get('lyrics', []))
+                if lyrics_duration > content['duration']:
+                    problems.append(f"Song '{item_label(item)}' lasts {content['duration']}s "
+                                    f"but its lyrics need {lyrics_duration}s")
+                elif lyrics_duration < content['duration']:
+                    problems.append(f"Song '{item_label(item)}' lasts {content['duration']}s "
+                                    f"but its lyrics only cover {lyrics_duration}s")
+            
+            for part in item_parts(item):
+                frames = part['duration'] * self.fps
+                if abs(frames - round(frames)) > 1e-9:
+                    problems.append(f"'{item_label(item)}': {part['duration']}s is not a whole number "
+                                    f"of frames at {self.fps} fps")
+        return problems
+    
+    def legacy_timeline(self):
+        """Items in the old create_timeline() format: {"type", "content", "start"}"""
+        return [{"type": item['type'], "content": item['content'], "start": item['start']}
+                for item in self.items]
+
+def resolve_item(item, scenes, songs):
+    """Turn a show-file entry into {"type", "content"}, looking up scenes/songs by name"""
+    if 'content' in item:
+        return {"type": item['type'], "content": item['content']}
+    if item.get('type') == 'dialogue' and 'scene' in item:
+        if item['scene'] not in scenes:
+            raise ValueError(f"Unknown scene in show: {item['scene']}")
+        return {"type": "dialogue", "content": scenes[item['scene']]}
+    if item.get('type') == 'song' and 'song' in item:
+        if item['song'] not in songs:
+            raise ValueError(f"Unknown song in show: {item['song']}")
+        return {"type": "song", "content": songs[item['song']]}
+    raise ValueError(f"Show entry needs inline content or a scene/song name: {item}")
+
+def read_show_file(path):
+    if os.path.splitext(path)[1].lower() in (".yaml", ".yml"):
+        try:
+            import yaml
+        except ImportError:
+            raise ImportError("Reading YAML shows needs PyYAML (pip install pyyaml)")
+        with open(path) as f:
+            return yaml.safe_load(f)
+    with open(path) as f:
+        return json.load(f)
+
+def load_show(path=DEFAULT_SHOW, fps=24, warn=False):
+    """Build a Timeline from a JSON/YAML show file
+    
+    Entries are either inline ({"type", "content"}) or refer to the scenes and
+    songs in dialogue_script.py by name ({"type": "dialogue", "scene": ...} or
+    {"type": "song", "song": ...}). warn prints Timeline.validate()'s problems;
+    renders leave it off and `python timeline.py` turns it on.
+    """
+    from dialogue_script import DIALOGUE_SCENES, SONGS
+    
+    scenes = {scene['scene']: scene for scene in DIALOGUE_SCENES}
+    songs = {song['title']: song for song in SONGS}
+    show = read_show_file(path)
+    
+    timeline = Timeline([resolve_item(item, scenes, songs) for item in show['items']], fps,
+                        title=show.get('title'))
+    if warn:
+        for problem in timeline.validate():
+            print(f"Warning: {problem}")
+    return timeline
+
+if __name__ == "__main__":
+    timeline = load_show(warn=True)
+    print(f"{timeline.title}: {timeline.duration}s, {timeline.total_frames} frames at {timeline.fps} fps")
+    for item in timeline.items:
+        print(f"{item['start']:6.1f}s - {item['type']}: {item_label(item)} ({item['duration']}s)")